@@ -15,8 +15,8 @@ async def discover_aws_resources(regions: Optional[List[str]] = None):
     """Discover AWS resources"""
     try:
         use_localstack = True  # Can be configured via env
-        discovery = AWSDiscoveryService(use_localstack=use_localstack)
-        resources = await discovery.discover_all(regions)
+        async with AWSDiscoveryService(use_localstack=use_localstack) as discovery:
+            resources = await discovery.discover_all(regions)
         return resources
         
     except Exception as e:
@@ -5,6 +5,7 @@ FastAPI application for GCP resource discovery and task management
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 import os
 
@@ -15,7 +16,8 @@ load_dotenv()
 app = FastAPI(
     title="Vibe DevOps API",
     description="Backend API for GCP resource discovery and task management",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -28,6 +30,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+async def shutdown_executors():
+    """Release shared agent and terraform worker pools"""
+    from services.agents._exec import shutdown_executors as _shutdown
+    from services.aws.terraform import shutdown_terraform_pool
+    _shutdown()
+    shutdown_terraform_pool()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,80 @@
+"""Helpers shared by the AWS and GCP Terraform services"""
+
+import os
+import shutil
+import stat
+import uuid
+import concurrent.futures
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Longest output/error text returned to callers; results flow into API responses and jsonb columns
+RESULT_TEXT_MAX_CHARS = 8192
+
+# Deletes renamed-aside workspaces. A module-level pool rather than event loop tasks, so
+# pending deletions are neither cancelled when an asyncio.run() loop closes nor stranded on
+# an idle per-thread loop; interpreter exit waits for them to finish.
+_cleanup_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="tf-cleanup")
+
+
+def _clip(text: Optional[str], limit: int = RESULT_TEXT_MAX_CHARS) -> Optional[str]:
+    """Keep only the last limit characters of a command's output"""
+    if text is None or len(text) <= limit:
+        return text
+    return text[-limit:]
+
+
+def _terraform_env(work_dir: str) -> Tuple[str, Dict[str, str]]:
+    """Create the shared provider cache under work_dir and build the terraform environment"""
+    # Share downloaded providers across workspaces instead of fetching them per stack.
+    # Fresh workspaces have no lock file, and Terraform >= 1.4 skips the cache for
+    # providers missing from it unless told otherwise.
+    plugin_cache = os.path.join(work_dir, ".plugin-cache")
+    os.makedirs(plugin_cache, exist_ok=True)
+    return plugin_cache, {
+        **os.environ,
+        "TF_PLUGIN_CACHE_DIR": plugin_cache,
+        "TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE": "1",
+        "TF_IN_AUTOMATION": "1",
+        # Plain text output: no ANSI escapes to capture, store or strip
+        "TF_CLI_ARGS": f"{os.environ.get('TF_CLI_ARGS', '')} -no-color".strip()
+    }
+
+
+def _retry_rm(func, path, exc_info):
+    """rmtree error handler: clear the read-only bit and retry once"""
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+def _remove_tree(path: str):
+    """Delete a directory tree (runs in the cleanup pool)"""
+    try:
+        shutil.rmtree(path, onerror=_retry_rm)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error(f"Workspace cleanup failed for {path}: {str(e)}")
+
+
+def _sweep_trash(work_dir: str):
+    """Queue deletion of renamed-aside workspaces left behind by an earlier process"""
+    with os.scandir(work_dir) as it:
+        for entry in it:
+            if entry.name.startswith(".trash-") and entry.is_dir(follow_symlinks=False):
+                _cleanup_pool.submit(_remove_tree, entry.path)
+
+
+def _discard_workspace(workspace_path: str):
+    """Rename a workspace aside so its name is free at once, and delete it in the cleanup pool"""
+    if not os.path.exists(workspace_path):
+        return
+    trash_path = os.path.join(os.path.dirname(workspace_path), f".trash-{uuid.uuid4().hex}")
+    try:
+        os.rename(workspace_path, trash_path)
+    except OSError as e:
+        logger.error(f"Workspace cleanup failed for {workspace_path}: {str(e)}")
+        return
+    _cleanup_pool.submit(_remove_tree, trash_path)
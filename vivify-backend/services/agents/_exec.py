@@ -0,0 +1,47 @@
+"""Shared executors and event-loop helpers for agents"""
+
+import os
+import asyncio
+import threading
+import concurrent.futures
+
+# Process pool for CPU-bound analysis so it never blocks the event loop
+_cpu_pool = concurrent.futures.ProcessPoolExecutor(
+    max_workers=max(2, (os.cpu_count() or 2) // 2)
+)
+
+# Thread pool for blocking Gemini API calls, sized to the API's concurrency ceiling
+_gemini_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=16,
+    thread_name_prefix="gemini"
+)
+
+# Per-thread event loop reused by synchronous agent __call__ dispatchers
+_local = threading.local()
+
+
+def _run_sync(coro):
+    """Run a coroutine to completion from synchronous code, reusing a cached per-thread loop
+    
+    Raises RuntimeError inside a running event loop: blocking that loop until the agent
+    finishes would stall every other request, so async callers must await the method.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        loop = getattr(_local, "loop", None)
+        if loop is None or loop.is_closed():
+            loop = _local.loop = asyncio.new_event_loop()
+        return loop.run_until_complete(coro)
+    
+    coro.close()
+    raise RuntimeError(
+        "Agent __call__ cannot run inside a running event loop; "
+        f"await {coro.__qualname__}() instead"
+    )
+
+
+def shutdown_executors():
+    """Shut down shared executors (called on application shutdown)"""
+    _cpu_pool.shutdown(wait=False, cancel_futures=True)
+    _gemini_pool.shutdown(wait=False, cancel_futures=True)
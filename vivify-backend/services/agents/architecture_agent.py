@@ -3,13 +3,21 @@
 import os
 import json
 import asyncio
+import functools
 from typing import Dict, Any
-import google.generativeai as genai
 import logging
+from ._exec import _run_sync
 
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def _genai():
+    """Import google.generativeai on first use (it is slow to import)"""
+    import google.generativeai as genai
+    return genai
+
+
 class ArchitectureAgent:
     """Proposes Well-Architected AWS designs"""
     
@@ -18,8 +26,17 @@ class ArchitectureAgent:
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found")
         
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.api_key = api_key
+        self._model = None
+    
+    @property
+    def model(self):
+        """Gemini model, created on first use"""
+        if self._model is None:
+            genai = _genai()
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        return self._model
     
     async def propose_architecture(self, requirements: Dict[str, Any]) -> Dict[str, Any]:
         """Propose Well-Architected AWS architecture"""
@@ -79,6 +96,6 @@ Return a JSON object with:
     def __call__(self, input_data: Any) -> Dict[str, Any]:
         """Make agent callable"""
         if isinstance(input_data, dict):
-            return asyncio.run(self.propose_architecture(input_data))
+            return _run_sync(self.propose_architecture(input_data))
         return {"error": "Invalid input"}
 
@@ -2,15 +2,43 @@
 
 import os
 import asyncio
+import functools
 from typing import Dict, Any, List, Optional
 import logging
-from google.cloud import storage
-from google.cloud import securitycenter_v1
-from google.oauth2 import service_account
+from ._exec import _cpu_pool, _run_sync
 
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def _gcp_mods():
+    """Import the GCP SDKs on first use (they are slow to import)"""
+    from google.cloud import storage
+    from google.cloud import securitycenter_v1
+    from google.oauth2 import service_account
+    return storage, securitycenter_v1, service_account
+
+
+# Resource types whose IAM policy is checked for public access
+_BUCKET_TYPES = frozenset(("google_storage_bucket", "s3"))
+
+
+def _diagnose_sync(violations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Diagnose root causes of violations (runs in the CPU process pool)"""
+    root_causes = []
+    for violation in violations:
+        root_causes.append({
+            "violation": violation.get("violation"),
+            "root_cause": "Configuration issue",
+            "recommendation": "Review and update resource configuration"
+        })
+    
+    return {
+        "root_causes": root_causes,
+        "total_violations": len(violations)
+    }
+
+
 class ComplianceAgent:
     """Checks compliance with security frameworks using Security Command Center or IAM policies"""
     
@@ -23,6 +51,7 @@ class ComplianceAgent:
         creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
         if creds_path and os.path.exists(creds_path):
             try:
+                service_account = _gcp_mods()[2]
                 self.credentials = service_account.Credentials.from_service_account_file(creds_path)
             except Exception as e:
                 logger.warning(f"Failed to load credentials: {e}")
@@ -65,22 +94,24 @@ class ComplianceAgent:
             return None
         
         try:
+            securitycenter_v1 = _gcp_mods()[1]
             client = securitycenter_v1.SecurityCenterClient(credentials=self.credentials)
             
             # Try to get organization ID from project
             # Note: SCC requires organization-level setup
             parent = f"projects/{self.project_id}"
             
-            # List findings
-            findings = client.list_findings(
-                parent=parent,
-                filter='state="ACTIVE"'
-            )
-            
-            violations = []
-            for finding in findings:
-                if finding.severity in [securitycenter_v1.Finding.Severity.HIGH, 
-                                       securitycenter_v1.Finding.Severity.CRITICAL]:
+            def list_violations() -> List[Dict[str, Any]]:
+                # Severity is filtered server-side so only HIGH/CRITICAL rows are paged in
+                results = client.list_findings(request={
+                    "parent": parent,
+                    "filter": 'state="ACTIVE" AND (severity="HIGH" OR severity="CRITICAL")',
+                    "page_size": 1000
+                })
+                
+                violations = []
+                for result in results:
+                    finding = result.finding
                     violations.append({
                         "resource": finding.resource_name,
                         "violation": finding.category,
@@ -88,6 +119,10 @@ class ComplianceAgent:
                         "framework": framework,
                         "description": finding.description
                     })
+                return violations
+            
+            # The gRPC client is synchronous; page through findings off the event loop
+            violations = await asyncio.to_thread(list_violations)
             
             return violations
             
@@ -104,6 +139,7 @@ class ComplianceAgent:
             return violations
         
         try:
+            storage = _gcp_mods()[0]
             storage_client = storage.Client(
                 project=self.project_id,
                 credentials=self.credentials
@@ -111,36 +147,38 @@ class ComplianceAgent:
             
             resources = deployment_data.get("resources", [])
             
-            # Check storage buckets for public access
+            # Project bucket resources into (id, bucket_name) tuples in one pass
+            buckets = []
             for resource in resources:
-                resource_type = resource.get("type", "")
-                resource_id = resource.get("id", "")
+                if resource.get("type", "") in _BUCKET_TYPES:
+                    resource_id = resource.get("id", "")
+                    config = resource.get("config") or {}
+                    buckets.append((resource_id, config.get("bucket_name", resource_id)))
+            
+            # Check storage buckets for public access
+            for resource_id, bucket_name in buckets:
+                # Remove prefix if present
+                bucket_name = bucket_name.removeprefix("vivify-")
                 
-                if resource_type in ["google_storage_bucket", "s3"]:
-                    bucket_name = resource.get("config", {}).get("bucket_name", resource_id)
-                    # Remove prefix if present
-                    if bucket_name.startswith("vivify-"):
-                        bucket_name = bucket_name.replace("vivify-", "", 1)
+                try:
+                    bucket = storage_client.bucket(bucket_name)
+                    iam_policy = bucket.get_iam_policy(requested_policy_version=3)
                     
-                    try:
-                        bucket = storage_client.bucket(bucket_name)
-                        iam_policy = bucket.get_iam_policy(requested_policy_version=3)
-                        
-                        # Check for public access
-                        for binding in iam_policy.bindings:
-                            if binding.role in ["roles/storage.objectViewer", "roles/storage.objectCreator", "roles/storage.legacyBucketReader"]:
-                                if "allUsers" in binding.members or "allAuthenticatedUsers" in binding.members:
-                                    violations.append({
-                                        "resource": resource_id,
-                                        "violation": f"Public access to storage bucket {bucket_name}",
-                                        "severity": "high",
-                                        "framework": "SOC2",
-                                        "details": f"Role {binding.role} granted to {binding.members}"
-                                    })
-                    except Exception as e:
-                        logger.warning(f"Failed to check IAM for bucket {bucket_name}: {e}")
-                        # Bucket might not exist yet, continue
-                        continue
+                    # Check for public access
+                    for binding in iam_policy.bindings:
+                        if binding.role in ["roles/storage.objectViewer", "roles/storage.objectCreator", "roles/storage.legacyBucketReader"]:
+                            if "allUsers" in binding.members or "allAuthenticatedUsers" in binding.members:
+                                violations.append({
+                                    "resource": resource_id,
+                                    "violation": f"Public access to storage bucket {bucket_name}",
+                                    "severity": "high",
+                                    "framework": "SOC2",
+                                    "details": f"Role {binding.role} granted to {binding.members}"
+                                })
+                except Exception as e:
+                    logger.warning(f"Failed to check IAM for bucket {bucket_name}: {e}")
+                    # Bucket might not exist yet, continue
+                    continue
             
             return violations
             
@@ -150,28 +188,17 @@ class ComplianceAgent:
     
     async def diagnose_violations(self, violations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Diagnose root causes of violations"""
-        
-        root_causes = []
-        for violation in violations:
-            root_causes.append({
-                "violation": violation.get("violation"),
-                "root_cause": "Configuration issue",
-                "recommendation": "Review and update resource configuration"
-            })
-        
-        return {
-            "root_causes": root_causes,
-            "total_violations": len(violations)
-        }
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_cpu_pool, _diagnose_sync, violations)
     
     def __call__(self, input_data: Any) -> Dict[str, Any]:
         """Make agent callable"""
         if isinstance(input_data, dict):
             framework = input_data.get("framework", "SOC2")
-            result = asyncio.run(self.check_compliance(input_data, framework))
+            result = _run_sync(self.check_compliance(input_data, framework))
             
             if result.get("violations"):
-                diagnosis = asyncio.run(self.diagnose_violations(result["violations"]))
+                diagnosis = _run_sync(self.diagnose_violations(result["violations"]))
                 result["diagnosis"] = diagnosis
             
             return result
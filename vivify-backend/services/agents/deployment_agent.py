@@ -1,10 +1,10 @@
 """Deployment Agent - plans, applies, rolls back; handles drift"""
 
 import os
-import asyncio
 from typing import Dict, Any
 from services.gcp.deployment import GCPDeploymentService
 import logging
+from ._exec import _run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -64,14 +64,14 @@ class DeploymentAgent:
                 stack_name = input_data["stack_name"]
                 
                 if action == "deploy":
-                    return asyncio.run(self.deploy(input_data))
+                    return _run_sync(self.deploy(input_data))
                 elif action == "rollback":
-                    return asyncio.run(self.rollback(stack_name))
+                    return _run_sync(self.rollback(stack_name))
                 elif action == "drift":
-                    return asyncio.run(self.detect_drift(stack_name))
+                    return _run_sync(self.detect_drift(stack_name))
             
             # Default: deploy
-            return asyncio.run(self.deploy(input_data))
+            return _run_sync(self.deploy(input_data))
         
         return {"error": "Invalid input"}
 
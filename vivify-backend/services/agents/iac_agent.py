@@ -1,10 +1,10 @@
 """IaC Generation Agent - emits Terraform/CloudFormation with module graph"""
 
 import os
-import asyncio
 from typing import Dict, Any, List, Optional
 from services.gcp.terraform import GCPTerraformService
 import logging
+from ._exec import _run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -41,7 +41,7 @@ class IaCAgent:
                     resource["type"] = "google_cloudfunctions_function"
                 mapped_resources.append(resource)
             
-            # Generate Terraform config
+            # Generate Terraform config (a few small template renders, memoized on disk)
             terraform_config = self.terraform.generate_terraform_config(
                 resources=mapped_resources,
                 project_id=project_id,
@@ -94,6 +94,6 @@ class IaCAgent:
     def __call__(self, input_data: Any) -> Dict[str, Any]:
         """Make agent callable"""
         if isinstance(input_data, dict):
-            return asyncio.run(self.generate_iac(input_data))
+            return _run_sync(self.generate_iac(input_data))
         return {"error": "Invalid input"}
 
@@ -1,14 +1,36 @@
 """Monitoring/Cost Agent - wires alarms/dashboards and estimates cost"""
 
 import os
+import math
 import asyncio
+import threading
 from typing import Dict, Any, Optional
 import logging
 from google.cloud import monitoring_v3
 from google.oauth2 import service_account
+from ._exec import _run_sync
 
 logger = logging.getLogger(__name__)
 
+# Alert policies created for every deployment (threshold in percent)
+_ALERT_POLICIES = [
+    {
+        "name": "high-cpu-alarm",
+        "condition": "CPU utilization is above 80%",
+        "resource_type": "gce_instance",
+        "metric": "compute.googleapis.com/instance/cpu/utilization",
+        "threshold": 80
+    }
+]
+
+# Simplified monthly cost per resource type
+_COST_PER_RESOURCE = {
+    "s3": 0.023,  # per GB/month
+    "lambda": 0.20,  # per 1M requests
+    "ec2": 10.0,  # per instance/month (t2.micro)
+    "vpc": 0.0  # free
+}
+
 
 class MonitoringAgent:
     """Sets up monitoring and cost estimation using Cloud Monitoring"""
@@ -16,6 +38,7 @@ class MonitoringAgent:
     def __init__(self):
         self.project_id = os.getenv("GCP_PROJECT_ID")
         self.credentials = None
+        self._alert_client = None
         
         # Load credentials if available
         creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
@@ -24,6 +47,22 @@ class MonitoringAgent:
                 self.credentials = service_account.Credentials.from_service_account_file(creds_path)
             except Exception as e:
                 logger.warning(f"Failed to load credentials: {e}")
+        
+        # Build the alert client up front and warm its gRPC channel in the background
+        if self.project_id:
+            try:
+                self._alert_client = monitoring_v3.AlertPolicyServiceClient(credentials=self.credentials)
+                threading.Thread(target=self._warm_channel, name="monitoring-warmup", daemon=True).start()
+            except Exception as e:
+                logger.warning(f"Failed to create alert policy client: {e}")
+    
+    def _warm_channel(self):
+        """Force the TLS/HTTP2 handshake with a cheap list call"""
+        try:
+            request = {"name": f"projects/{self.project_id}", "page_size": 1}
+            next(iter(self._alert_client.list_alert_policies(request=request)), None)
+        except Exception as e:
+            logger.debug(f"Alert policy channel warm-up failed: {e}")
     
     async def setup_monitoring(self, deployment_data: Dict[str, Any]) -> Dict[str, Any]:
         """Setup Cloud Monitoring alert policies and dashboards"""
@@ -37,49 +76,44 @@ class MonitoringAgent:
             }
         
         try:
-            # Create alert policy client
-            alert_client = monitoring_v3.AlertPolicyServiceClient(credentials=self.credentials)
+            # Reuse one alert policy client so the gRPC channel is set up once
+            if self._alert_client is None:
+                self._alert_client = monitoring_v3.AlertPolicyServiceClient(credentials=self.credentials)
+            alert_client = self._alert_client
             project_name = f"projects/{self.project_id}"
             
-            # Create a simple alert policy for high CPU
-            alert_policy = monitoring_v3.AlertPolicy()
-            alert_policy.display_name = "high-cpu-alarm"
-            alert_policy.combiner = monitoring_v3.AlertPolicy.ConditionCombinerType.OR
-            
-            # Create condition for CPU utilization
-            condition = monitoring_v3.AlertPolicy.Condition()
-            condition.display_name = "CPU utilization is above 80%"
+            policies = [self._build_alert_policy(spec) for spec in _ALERT_POLICIES]
+            semaphore = asyncio.Semaphore(10)
             
-            # Create metric threshold condition
-            condition.condition_threshold = monitoring_v3.AlertPolicy.Condition.MetricThreshold()
-            condition.condition_threshold.filter = 'resource.type="gce_instance" AND metric.type="compute.googleapis.com/instance/cpu/utilization"'
-            condition.condition_threshold.comparison = monitoring_v3.ComparisonType.COMPARISON_GT
-            condition.condition_threshold.threshold_value = 0.8
-            condition.condition_threshold.duration = {"seconds": 300}  # 5 minutes
+            async def create_policy(alert_policy):
+                async with semaphore:
+                    return await asyncio.to_thread(
+                        alert_client.create_alert_policy,
+                        name=project_name,
+                        alert_policy=alert_policy
+                    )
             
-            alert_policy.conditions = [condition]
+            # Create all alert policies concurrently
+            created = await asyncio.gather(
+                *[create_policy(policy) for policy in policies],
+                return_exceptions=True
+            )
             
-            # Create the alert policy
-            try:
-                created_policy = alert_client.create_alert_policy(
-                    name=project_name,
-                    alert_policy=alert_policy
-                )
-                policy_id = created_policy.name.split("/")[-1]
-            except Exception as e:
-                logger.warning(f"Failed to create alert policy: {e}")
-                policy_id = None
+            alarms = []
+            for spec, created_policy in zip(_ALERT_POLICIES, created):
+                if isinstance(created_policy, Exception):
+                    logger.warning(f"Failed to create alert policy {spec['name']}: {created_policy}")
+                    continue
+                alarms.append({
+                    "name": spec["name"],
+                    "id": created_policy.name.split("/")[-1],
+                    "metric": spec["metric"],
+                    "threshold": spec["threshold"]
+                })
             
             # For dashboards, we'll return a placeholder (dashboard creation is more complex)
             return {
-                "alarms": [
-                    {
-                        "name": "high-cpu-alarm",
-                        "id": policy_id,
-                        "metric": "compute.googleapis.com/instance/cpu/utilization",
-                        "threshold": 80
-                    }
-                ] if policy_id else [],
+                "alarms": alarms,
                 "dashboards": [
                     {
                         "name": "infrastructure-dashboard",
@@ -96,26 +130,39 @@ class MonitoringAgent:
                 "error": str(e)
             }
     
-    async def estimate_cost(self, resources: Dict[str, Any]) -> Dict[str, Any]:
-        """Estimate infrastructure costs"""
+    @staticmethod
+    def _build_alert_policy(spec: Dict[str, Any]) -> "monitoring_v3.AlertPolicy":
+        """Build a metric threshold alert policy from a spec"""
+        alert_policy = monitoring_v3.AlertPolicy()
+        alert_policy.display_name = spec["name"]
+        alert_policy.combiner = monitoring_v3.AlertPolicy.ConditionCombinerType.OR
         
-        # Simplified cost estimation
-        cost_per_resource = {
-            "s3": 0.023,  # per GB/month
-            "lambda": 0.20,  # per 1M requests
-            "ec2": 10.0,  # per instance/month (t2.micro)
-            "vpc": 0.0  # free
-        }
+        condition = monitoring_v3.AlertPolicy.Condition()
+        condition.display_name = spec["condition"]
         
-        total_cost = 0.0
-        breakdown = {}
+        # Create metric threshold condition
+        condition.condition_threshold = monitoring_v3.AlertPolicy.Condition.MetricThreshold()
+        condition.condition_threshold.filter = f'resource.type="{spec["resource_type"]}" AND metric.type="{spec["metric"]}"'
+        condition.condition_threshold.comparison = monitoring_v3.ComparisonType.COMPARISON_GT
+        condition.condition_threshold.threshold_value = spec["threshold"] / 100
+        condition.condition_threshold.duration = {"seconds": 300}  # 5 minutes
+        
+        alert_policy.conditions = [condition]
+        return alert_policy
+    
+    async def estimate_cost(self, resources: Dict[str, Any]) -> Dict[str, Any]:
+        """Estimate infrastructure costs"""
         
         resource_list = resources.get("resources", [])
-        for resource in resource_list:
-            resource_type = resource.get("type", "").lower()
-            cost = cost_per_resource.get(resource_type, 0.0)
-            total_cost += cost
-            breakdown[resource.get("id", "")] = cost
+        
+        # Build parallel id/cost columns, then construct and sum them in C
+        ids = [resource.get("id", "") for resource in resource_list]
+        costs = [
+            _COST_PER_RESOURCE.get(resource.get("type", "").lower(), 0.0)
+            for resource in resource_list
+        ]
+        breakdown = dict(zip(ids, costs))
+        total_cost = math.fsum(costs)
         
         return {
             "total_monthly_cost": total_cost,
@@ -128,10 +175,10 @@ class MonitoringAgent:
         if isinstance(input_data, dict):
             if "action" in input_data:
                 if input_data["action"] == "estimate_cost":
-                    return asyncio.run(self.estimate_cost(input_data))
+                    return _run_sync(self.estimate_cost(input_data))
             
             # Default: setup monitoring
-            return asyncio.run(self.setup_monitoring(input_data))
+            return _run_sync(self.setup_monitoring(input_data))
         
         return {"error": "Invalid input"}
 
@@ -1,14 +1,80 @@
 """Requirements Agent - extracts services/SLAs/constraints from natural language"""
 
 import os
+import re
+import copy
 import json
 import asyncio
-from typing import Dict, Any
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple
 import google.generativeai as genai
 import logging
+from ._exec import _gemini_pool, _run_sync
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    # orjson is optional; fall back to the stdlib parser
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Fenced code block (optionally tagged json) wrapping the model's JSON output
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_model(api_key: str) -> "genai.GenerativeModel":
+    """Configure Gemini once and share the model (and its transport) across agents"""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel('gemini-2.0-flash-exp')
+
+
+_SYSTEM_PROMPT = """You are a Requirements Agent. Extract structured requirements from user input.
+Return a JSON object with:
+- services: list of AWS services needed (e.g., ["S3", "Lambda", "VPC"])
+- slas: service level agreements (availability, latency, etc.)
+- constraints: technical or business constraints
+- requirements: detailed requirements as structured data"""
+
+# Concurrent extractions are coalesced into one Gemini call of up to
+# _BATCH_MAX inputs, waiting at most _BATCH_WINDOW seconds for a batch to fill
+_BATCH_MAX = 10
+_BATCH_WINDOW = 0.05
+
+# Content-addressed LRU of extracted requirements, keyed by SHA-256 of the normalized input
+_CACHE_SIZE = 1024
+_response_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_key(user_input: str) -> bytes:
+    """Hash the trimmed, case-folded input"""
+    return hashlib.sha256(user_input.strip().lower().encode()).digest()
+
+
+def _cache_get(key: bytes) -> Optional[Dict[str, Any]]:
+    """Return a copy of a cached result, marking it recently used"""
+    with _cache_lock:
+        result = _response_cache.get(key)
+        if result is None:
+            return None
+        _response_cache.move_to_end(key)
+    return copy.deepcopy(result)
+
+
+def _cache_put(key: bytes, result: Dict[str, Any]):
+    """Store a result, evicting the least recently used entry when full"""
+    with _cache_lock:
+        _response_cache[key] = copy.deepcopy(result)
+        _response_cache.move_to_end(key)
+        if len(_response_cache) > _CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
 
 class RequirementsAgent:
     """Extracts structured requirements from natural language"""
@@ -18,38 +84,97 @@ class RequirementsAgent:
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found")
         
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.model = _get_model(api_key)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Running batches, referenced until done so they are not garbage-collected mid-flight
+        self._batch_tasks: Set[asyncio.Task] = set()
     
     async def extract_requirements(self, user_input: str) -> Dict[str, Any]:
         """Extract services, SLAs, and constraints from natural language"""
+        key = _cache_key(user_input)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
         
-        system_prompt = """You are a Requirements Agent. Extract structured requirements from user input.
-Return a JSON object with:
-- services: list of AWS services needed (e.g., ["S3", "Lambda", "VPC"])
-- slas: service level agreements (availability, latency, etc.)
-- constraints: technical or business constraints
-- requirements: detailed requirements as structured data"""
+        result = await self._enqueue(user_input)
         
-        full_prompt = f"{system_prompt}\n\nUser input: {user_input}"
+        # Only cache real answers, not error placeholders
+        requirements = result.get("requirements") if isinstance(result, dict) else None
+        if not (isinstance(requirements, dict) and "error" in requirements):
+            _cache_put(key, result)
+        return result
+    
+    async def _enqueue(self, user_input: str) -> Dict[str, Any]:
+        """Queue an input for the next batched Gemini call"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((user_input, future))
+        
+        if len(self._pending) >= _BATCH_MAX:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(_BATCH_WINDOW, self._flush)
         
+        return await future
+    
+    def _flush(self):
+        """Send all queued inputs to Gemini as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._resolve_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _resolve_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Run a batch, failing every caller still waiting if it raises, so none hang"""
         try:
-            response = await asyncio.to_thread(self.model.generate_content, full_prompt)
+            await self._run_batch(batch)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Requirements batch failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+    
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Resolve each caller's future from a single (or fallback per-input) extraction"""
+        inputs = [user_input for user_input, _ in batch]
+        
+        if len(inputs) == 1:
+            results = [await self._extract_one(inputs[0])]
+        else:
+            try:
+                results = await self._extract_many(inputs)
+            except Exception as e:
+                logger.warning(f"Batched requirements extraction failed, retrying individually: {e}")
+                results = await asyncio.gather(*[self._extract_one(user_input) for user_input in inputs])
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    async def _extract_one(self, user_input: str) -> Dict[str, Any]:
+        """Extract requirements for a single input"""
+        full_prompt = f"{_SYSTEM_PROMPT}\n\nUser input: {user_input}"
+        
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(
+                _gemini_pool, self.model.generate_content, full_prompt
+            )
             
             # Parse response
-            text = response.text
-            # Try to extract JSON from response
-            if "```json" in text:
-                json_start = text.find("```json") + 7
-                json_end = text.find("```", json_start)
-                text = text[json_start:json_end].strip()
-            elif "```" in text:
-                json_start = text.find("```") + 3
-                json_end = text.find("```", json_start)
-                text = text[json_start:json_end].strip()
+            text = self._strip_fence(response.text)
             
             try:
-                result = json.loads(text)
+                result = _json_loads(text)
             except json.JSONDecodeError:
                 # Fallback: create structured response
                 result = {
@@ -70,14 +195,35 @@ Return a JSON object with:
                 "requirements": {"error": str(e)}
             }
     
+    async def _extract_many(self, user_inputs: List[str]) -> List[Dict[str, Any]]:
+        """Extract requirements for several inputs with one Gemini call"""
+        numbered = "\n".join(f"{i}) {user_input}" for i, user_input in enumerate(user_inputs, 1))
+        full_prompt = (
+            f"{_SYSTEM_PROMPT}\n\n"
+            f"Parse each input and return a JSON array of {len(user_inputs)} such objects, "
+            f"in the same order:\n{numbered}"
+        )
+        
+        response = await asyncio.get_running_loop().run_in_executor(
+            _gemini_pool, self.model.generate_content, full_prompt
+        )
+        results = _json_loads(self._strip_fence(response.text))
+        
+        if not isinstance(results, list) or len(results) != len(user_inputs):
+            raise ValueError(f"Expected a JSON array of {len(user_inputs)} objects")
+        return results
+    
+    @staticmethod
+    def _strip_fence(text: str) -> str:
+        """Extract JSON from a fenced code block if present"""
+        match = _FENCE.search(text)
+        return match.group(1) if match else text
+    
     def __call__(self, input_data: Any) -> Dict[str, Any]:
         """Make agent callable"""
         if isinstance(input_data, str):
-            import asyncio
-            return asyncio.run(self.extract_requirements(input_data))
+            return _run_sync(self.extract_requirements(input_data))
         elif isinstance(input_data, dict):
             user_input = input_data.get("user_input", "")
-            import asyncio
-            return asyncio.run(self.extract_requirements(user_input))
+            return _run_sync(self.extract_requirements(user_input))
         return {"error": "Invalid input"}
-
@@ -1,9 +1,11 @@
 """Deployment service for AWS infrastructure"""
 
 import os
+import json
 import asyncio
 from typing import Dict, Any, Optional
 import logging
+import aiofiles
 from .terraform import TerraformService
 
 logger = logging.getLogger(__name__)
@@ -29,27 +31,24 @@ class DeploymentService:
             workspace_path = self.terraform.create_workspace(stack_name)
             
             # Write Terraform config
-            with open(os.path.join(workspace_path, "main.tf"), "w") as f:
-                f.write(terraform_config)
+            async with aiofiles.open(os.path.join(workspace_path, "main.tf"), "w") as f:
+                await f.write(terraform_config)
             
             # Write variables if provided
             if variables:
-                with open(os.path.join(workspace_path, "terraform.tfvars"), "w") as f:
-                    for key, value in variables.items():
-                        if isinstance(value, str):
-                            f.write(f'{key} = "{value}"\n')
-                        else:
-                            f.write(f'{key} = {value}\n')
+                async with aiofiles.open(os.path.join(workspace_path, "terraform.tfvars"), "w") as f:
+                    # JSON literals are valid HCL for strings, numbers, bools, lists and maps
+                    await f.write("".join(f"{key} = {json.dumps(value)}\n" for key, value in variables.items()))
             
             # Initialize
-            if not self.terraform.init_terraform(workspace_path):
+            if not await self.terraform.init_terraform(workspace_path):
                 return {
                     "success": False,
                     "error": "Terraform initialization failed"
                 }
             
             # Plan
-            plan_result = self.terraform.plan_terraform(workspace_path)
+            plan_result = await self.terraform.plan_terraform(workspace_path)
             if not plan_result["success"]:
                 return {
                     "success": False,
@@ -57,7 +56,7 @@ class DeploymentService:
                 }
             
             # Apply
-            apply_result = self.terraform.apply_terraform(workspace_path)
+            apply_result = await self.terraform.apply_terraform(workspace_path)
             
             self.active_deployments[stack_name] = {
                 "workspace_path": workspace_path,
@@ -87,11 +86,11 @@ class DeploymentService:
             }
         
         workspace_path = self.active_deployments[stack_name]["workspace_path"]
-        destroy_result = self.terraform.destroy_terraform(workspace_path)
+        destroy_result = await self.terraform.destroy_terraform(workspace_path)
         
         if destroy_result["success"]:
             del self.active_deployments[stack_name]
-            self.terraform.cleanup_workspace(workspace_path)
+            await self.terraform.cleanup_workspace(workspace_path)
         
         return {
             "success": destroy_result["success"],
@@ -107,5 +106,5 @@ class DeploymentService:
             }
         
         workspace_path = self.active_deployments[stack_name]["workspace_path"]
-        return self.terraform.detect_drift(workspace_path)
+        return await self.terraform.detect_drift(workspace_path)
 
@@ -2,56 +2,187 @@
 
 import boto3
 import os
-from typing import List, Dict, Any, Optional
+import time
+import asyncio
+import functools
+import contextlib
+import concurrent.futures
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def _aioboto3():
+    """Import aioboto3 on first use (only needed for the async discovery path)"""
+    import aioboto3
+    return aioboto3
+
+
 class AWSDiscoveryService:
     """Service for discovering AWS resources"""
     
-    def __init__(self, region: str = "us-east-1", use_localstack: bool = True):
+    # Short-lived cache for slow-changing listings (S3 buckets, VPCs). Shared across
+    # instances because the API builds a new service per request.
+    _cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+    
+    # In-flight listings keyed like _cache, so concurrent pollers share one API call
+    # instead of each issuing their own (DescribeInstances is throttled per account)
+    _inflight: Dict[str, "asyncio.Task[List[Dict[str, Any]]]"] = {}
+    
+    def __init__(
+        self,
+        region: str = "us-east-1",
+        use_localstack: bool = True,
+        max_parallel_requests: Optional[int] = None
+    ):
         self.region = region
         self.use_localstack = use_localstack
+        self._client_cache: Dict[Tuple[str, str], Any] = {}
+        self._cache_ttl = float(os.getenv("VIVIFY_DISCOVERY_TTL", "60"))
+        
+        # Dedicated I/O pool so fanned-out boto3 calls don't queue on the default executor
+        if max_parallel_requests is None:
+            max_parallel_requests = int(os.getenv("VIVIFY_AWS_WORKERS", (os.cpu_count() or 1) * 5))
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_parallel_requests,
+            thread_name_prefix="aws-disc"
+        )
         
-        # Configure endpoint for LocalStack
-        endpoint_url = None
+        # Snapshot endpoint and credentials once instead of reading the environment per call
+        self._endpoint_url = None
         if use_localstack:
-            endpoint_url = os.getenv("LOCALSTACK_ENDPOINT", "http://localhost:4566")
+            self._endpoint_url = os.getenv("LOCALSTACK_ENDPOINT", "http://localhost:4566")
+        self._akid = os.getenv("AWS_ACCESS_KEY_ID", "test")
+        self._secret = os.getenv("AWS_SECRET_ACCESS_KEY", "test")
         
-        # Initialize clients
-        self.ec2 = boto3.client(
-            'ec2',
-            region_name=region,
-            endpoint_url=endpoint_url,
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test")
+        # One session for every client so credential and endpoint resolution happen once
+        self._session = boto3.session.Session(
+            aws_access_key_id=self._akid,
+            aws_secret_access_key=self._secret,
+            region_name=region
         )
         
-        self.s3 = boto3.client(
-            's3',
-            region_name=region,
-            endpoint_url=endpoint_url,
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test")
-        )
+        # Native async clients scale better at high fan-out; threads win at small N, so keep both
+        self._use_aio = os.getenv("VIVIFY_AWS_ASYNC") == "1"
+        self._aio_session = None
+        # aioboto3 clients per (service, region), opened on first use and closed in __aexit__
+        self._aio_clients: Dict[Tuple[str, str], Any] = {}
+        self._aio_stack = contextlib.AsyncExitStack()
+        if self._use_aio:
+            self._aio_session = _aioboto3().Session(
+                aws_access_key_id=self._akid,
+                aws_secret_access_key=self._secret,
+                region_name=region
+            )
         
-        self.lambda_client = boto3.client(
-            'lambda',
-            region_name=region,
-            endpoint_url=endpoint_url,
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test")
-        )
+        # Initialize clients
+        self.ec2 = self._session.client('ec2', endpoint_url=self._endpoint_url)
+        self.s3 = self._session.client('s3', endpoint_url=self._endpoint_url)
+        self.lambda_client = self._session.client('lambda', endpoint_url=self._endpoint_url)
+        self.iam = self._session.client('iam', endpoint_url=self._endpoint_url)
+    
+    def close(self):
+        """Shut down the discovery thread pool
+        
+        Queued calls are left to finish: a coalesced listing started by this instance may
+        still be awaited by callers from other requests. aioboto3 clients are async and
+        are closed by __aexit__.
+        """
+        self._executor.shutdown(wait=False)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            await self._aio_stack.aclose()
+        finally:
+            self._aio_clients.clear()
+            self.close()
+    
+    def _client_kwargs(self, region: str) -> Dict[str, Any]:
+        """Per-client arguments on top of the shared session"""
+        if self.use_localstack:
+            return {
+                "region_name": region,
+                "endpoint_url": self._endpoint_url,
+                "aws_access_key_id": "test",
+                "aws_secret_access_key": "test"
+            }
+        return {"region_name": region}
+    
+    def _get_client(self, service: str, region: str):
+        """Get a cached boto3 client for a service in a region"""
+        key = (service, region)
+        client = self._client_cache.get(key)
+        if client is None:
+            client = self._session.client(service, **self._client_kwargs(region))
+            self._client_cache[key] = client
+        return client
+    
+    async def _get_aio_client(self, service: str, region: str):
+        """Get a cached aioboto3 client for a service in a region"""
+        key = (service, region)
+        client = self._aio_clients.get(key)
+        if client is None:
+            client = await self._aio_stack.enter_async_context(
+                self._aio_session.client(service, **self._client_kwargs(region))
+            )
+            # Another caller may have opened one meanwhile; keep the first, the stack closes both
+            client = self._aio_clients.setdefault(key, client)
+        return client
+    
+    @staticmethod
+    def _paginate(client, operation: str, page_size: int) -> List[Dict[str, Any]]:
+        """Fetch every page of a paginated boto3 operation (runs in the I/O pool)"""
+        paginator = client.get_paginator(operation)
+        return list(paginator.paginate(PaginationConfig={"PageSize": page_size}))
+    
+    async def _fetch_pages(self, service: str, region: str, operation: str, page_size: int) -> List[Dict[str, Any]]:
+        """Fetch every page of an operation via aioboto3 or the boto3 thread pool"""
+        if self._use_aio:
+            client = await self._get_aio_client(service, region)
+            paginator = client.get_paginator(operation)
+            return [page async for page in paginator.paginate(PaginationConfig={"PageSize": page_size})]
         
-        self.iam = boto3.client(
-            'iam',
-            endpoint_url=endpoint_url,
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test")
+        # Run in thread pool to avoid blocking
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._executor, self._paginate, self._get_client(service, region), operation, page_size
         )
     
+    async def _cached(
+        self,
+        key: str,
+        ttl: float,
+        fn: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """Return a cached listing if it is younger than ttl, otherwise refresh it"""
+        entry = self._cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        
+        value = await fn()
+        self._cache[key] = (time.monotonic(), value)
+        return value
+    
+    async def _coalesced(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """Await the running call for key if there is one, otherwise start it"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Shield so one caller being cancelled doesn't cancel the call for the others
+        return await asyncio.shield(task)
+    
     async def discover_all(self, regions: Optional[List[str]] = None) -> Dict[str, Any]:
         """Discover all AWS resources"""
         if regions is None:
@@ -63,29 +194,24 @@ class AWSDiscoveryService:
             "total_count": 0
         }
         
-        # Discover S3 buckets (once, not per region)
-        try:
-            s3_resources = await self._discover_s3()
-            resources["resources"].extend(s3_resources)
-        except Exception as e:
-            logger.error(f"Error discovering S3: {str(e)}")
-        
+        # Discover S3 once (not per region) plus EC2/Lambda/VPC per region, all concurrently
+        labels = ["S3"]
+        scope = f"{self._endpoint_url}|{self._akid}"
+        tasks = [self._cached(f"{scope}|s3", self._cache_ttl, self._discover_s3)]
         for region in regions:
-            try:
-                # Discover EC2 instances
-                ec2_resources = await self._discover_ec2(region)
-                resources["resources"].extend(ec2_resources)
-                
-                # Discover Lambda functions
-                lambda_resources = await self._discover_lambda(region)
-                resources["resources"].extend(lambda_resources)
-                
-                # Discover VPCs
-                vpc_resources = await self._discover_vpc(region)
-                resources["resources"].extend(vpc_resources)
-                
-            except Exception as e:
-                logger.error(f"Error discovering resources in {region}: {str(e)}")
+            labels.extend([f"EC2 in {region}", f"Lambda in {region}", f"VPC in {region}"])
+            tasks.extend([
+                self._coalesced(f"{scope}|ec2|{region}", functools.partial(self._discover_ec2, region)),
+                self._discover_lambda(region),
+                self._cached(f"{scope}|vpc|{region}", self._cache_ttl, functools.partial(self._discover_vpc, region))
+            ])
+        
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for label, result in zip(labels, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error discovering {label}: {str(result)}")
+                continue
+            resources["resources"].extend(result)
         
         resources["total_count"] = len(resources["resources"])
         return resources
@@ -93,47 +219,27 @@ class AWSDiscoveryService:
     async def _discover_ec2(self, region: str) -> List[Dict[str, Any]]:
         """Discover EC2 instances"""
         try:
-            # Update region for this call
-            if self.use_localstack:
-                endpoint_url = os.getenv("LOCALSTACK_ENDPOINT", "http://localhost:4566")
-                ec2_client = boto3.client(
-                    'ec2',
-                    region_name=region,
-                    endpoint_url=endpoint_url,
-                    aws_access_key_id='test',
-                    aws_secret_access_key='test'
-                )
-            else:
-                ec2_client = boto3.client(
-                    'ec2',
-                    region_name=region,
-                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
-                    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test")
-                )
-            
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, ec2_client.describe_instances)
+            pages = await self._fetch_pages('ec2', region, 'describe_instances', 1000)
             resources = []
             
-            for reservation in response.get('Reservations', []):
-                for instance in reservation.get('Instances', []):
-                    resources.append({
-                        "type": "ec2",
-                        "id": instance.get('InstanceId'),
-                        "name": next(
-                            (tag['Value'] for tag in instance.get('Tags', []) if tag['Key'] == 'Name'),
-                            instance.get('InstanceId')
-                        ),
-                        "region": region,
-                        "status": instance.get('State', {}).get('Name'),
-                        "instance_type": instance.get('InstanceType'),
-                        "metadata": {
-                            "vpc_id": instance.get('VpcId'),
-                            "subnet_id": instance.get('SubnetId'),
-                            "security_groups": [sg['GroupId'] for sg in instance.get('SecurityGroups', [])]
-                        }
-                    })
+            for page in pages:
+                for reservation in page.get('Reservations', []):
+                    for instance in reservation.get('Instances', []):
+                        tags = {tag['Key']: tag['Value'] for tag in instance.get('Tags') or ()}
+                        resources.append({
+                            "type": "ec2",
+                            "id": instance.get('InstanceId'),
+                            "name": tags.get('Name', instance.get('InstanceId')),
+                            "region": region,
+                            "status": instance.get('State', {}).get('Name'),
+                            "instance_type": instance.get('InstanceType'),
+                            "metadata": {
+                                "vpc_id": instance.get('VpcId'),
+                                "subnet_id": instance.get('SubnetId'),
+                                "security_groups": [sg['GroupId'] for sg in instance.get('SecurityGroups', [])],
+                                "tags": tags
+                            }
+                        })
             
             return resources
         except Exception as e:
@@ -141,67 +247,53 @@ class AWSDiscoveryService:
             return []
     
     async def _discover_s3(self) -> List[Dict[str, Any]]:
-        """Discover S3 buckets"""
-        try:
+        """Discover S3 buckets (errors propagate, so a failed listing is never cached)"""
+        if self._use_aio:
+            s3 = await self._get_aio_client('s3', self.region)
+            response = await s3.list_buckets()
+        else:
             # Run in thread pool to avoid blocking
             loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, self.s3.list_buckets)
-            resources = []
-            
-            for bucket in response.get('Buckets', []):
-                created_date = bucket.get('CreationDate')
-                created_str = created_date.isoformat() if created_date else None
-                
-                resources.append({
-                    "type": "s3",
-                    "id": bucket.get('Name'),
-                    "name": bucket.get('Name'),
-                    "region": "global",
-                    "status": "active",
-                    "metadata": {
-                        "created": created_str
-                    }
-                })
+            response = await loop.run_in_executor(self._executor, self.s3.list_buckets)
+        resources = []
+        
+        for bucket in response.get('Buckets', []):
+            created_date = bucket.get('CreationDate')
+            created_str = created_date.isoformat() if created_date else None
             
-            return resources
-        except Exception as e:
-            logger.error(f"Error discovering S3: {str(e)}")
-            return []
+            resources.append({
+                "type": "s3",
+                "id": bucket.get('Name'),
+                "name": bucket.get('Name'),
+                "region": "global",
+                "status": "active",
+                "metadata": {
+                    "created": created_str
+                }
+            })
+        
+        return resources
     
     async def _discover_lambda(self, region: str) -> List[Dict[str, Any]]:
         """Discover Lambda functions"""
         try:
-            # Update region for this call
-            if self.use_localstack:
-                endpoint_url = os.getenv("LOCALSTACK_ENDPOINT", "http://localhost:4566")
-                lambda_client = boto3.client(
-                    'lambda',
-                    region_name=region,
-                    endpoint_url=endpoint_url,
-                    aws_access_key_id='test',
-                    aws_secret_access_key='test'
-                )
-            else:
-                lambda_client = self.lambda_client
-            
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, lambda_client.list_functions)
+            pages = await self._fetch_pages('lambda', region, 'list_functions', 50)
             resources = []
             
-            for func in response.get('Functions', []):
-                resources.append({
-                    "type": "lambda",
-                    "id": func.get('FunctionName'),
-                    "name": func.get('FunctionName'),
-                    "region": region,
-                    "status": "active",
-                    "metadata": {
-                        "runtime": func.get('Runtime'),
-                        "memory_size": func.get('MemorySize'),
-                        "timeout": func.get('Timeout')
-                    }
-                })
+            for page in pages:
+                for func in page.get('Functions', []):
+                    resources.append({
+                        "type": "lambda",
+                        "id": func.get('FunctionName'),
+                        "name": func.get('FunctionName'),
+                        "region": region,
+                        "status": "active",
+                        "metadata": {
+                            "runtime": func.get('Runtime'),
+                            "memory_size": func.get('MemorySize'),
+                            "timeout": func.get('Timeout')
+                        }
+                    })
             
             return resources
         except Exception as e:
@@ -209,49 +301,25 @@ class AWSDiscoveryService:
             return []
     
     async def _discover_vpc(self, region: str) -> List[Dict[str, Any]]:
-        """Discover VPCs"""
-        try:
-            # Create EC2 client for this region
-            if self.use_localstack:
-                endpoint_url = os.getenv("LOCALSTACK_ENDPOINT", "http://localhost:4566")
-                ec2_client = boto3.client(
-                    'ec2',
-                    region_name=region,
-                    endpoint_url=endpoint_url,
-                    aws_access_key_id='test',
-                    aws_secret_access_key='test'
-                )
-            else:
-                ec2_client = boto3.client(
-                    'ec2',
-                    region_name=region,
-                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
-                    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test")
-                )
-            
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, ec2_client.describe_vpcs)
-            resources = []
-            
-            for vpc in response.get('Vpcs', []):
+        """Discover VPCs (errors propagate, so a failed listing is never cached)"""
+        pages = await self._fetch_pages('ec2', region, 'describe_vpcs', 1000)
+        resources = []
+        
+        for page in pages:
+            for vpc in page.get('Vpcs', []):
+                tags = {tag['Key']: tag['Value'] for tag in vpc.get('Tags') or ()}
                 resources.append({
                     "type": "vpc",
                     "id": vpc.get('VpcId'),
-                    "name": next(
-                        (tag['Value'] for tag in vpc.get('Tags', []) if tag['Key'] == 'Name'),
-                        vpc.get('VpcId')
-                    ),
+                    "name": tags.get('Name', vpc.get('VpcId')),
                     "region": region,
                     "status": vpc.get('State'),
                     "metadata": {
                         "cidr": vpc.get('CidrBlock'),
-                        "is_default": vpc.get('IsDefault', False)
+                        "is_default": vpc.get('IsDefault', False),
+                        "tags": tags
                     }
                 })
-            
-            return resources
-        except Exception as e:
-            logger.error(f"Error discovering VPC: {str(e)}")
-            return []
+        
+        return resources
 
@@ -2,31 +2,37 @@
 
 import os
 import json
+import asyncio
 import subprocess
+import threading
+import concurrent.futures
+import multiprocessing
+import functools
 import tempfile
-import shutil
-from typing import Dict, Any, Optional, List
+from collections import deque
+from typing import Dict, Any, Optional, List, Set
 import logging
 from pathlib import Path
+import jinja2
+from services._terraform import _clip, _discard_workspace, _sweep_trash, _terraform_env
 
 logger = logging.getLogger(__name__)
 
+# Human-readable event messages kept from a terraform run; the full stream stays in the worker
+OUTPUT_TAIL_LINES = 50
 
-class TerraformService:
-    """Service for Terraform operations"""
-    
-    def __init__(self, work_dir: Optional[str] = None):
-        self.work_dir = work_dir or os.path.join(tempfile.gettempdir(), "terraform_workspaces")
-        os.makedirs(self.work_dir, exist_ok=True)
-    
-    def generate_terraform_config(
-        self,
-        resources: List[Dict[str, Any]],
-        variables: Optional[Dict[str, Any]] = None
-    ) -> str:
-        """Generate Terraform configuration from resource definitions"""
-        
-        config = """terraform {
+# Fixed LocalStack provider settings, spliced into the provider block as one fragment
+_LOCALSTACK_PROVIDER_BLOCK = """  endpoints {
+    s3 = "http://localhost:4566"
+    ec2 = "http://localhost:4566"
+    lambda = "http://localhost:4566"
+    iam = "http://localhost:4566"
+  }
+  skip_credentials_validation = true
+  skip_metadata_api_check = true
+  skip_region_validation = true"""
+
+TEMPLATE_STR = """terraform {
   required_providers {
     aws = {
       source  = "hashicorp/aws"
@@ -37,72 +43,212 @@ class TerraformService:
 
 provider "aws" {
   region = var.aws_region
+{% if localstack %}
+{{ localstack_provider_block }}
+{% endif %}
+}
+
+{% if variables %}
+variable "aws_region" {
+  default = "us-east-1"
+}
+
+{% for var_name, var_value in variables.items() if var_name != "aws_region" %}
+variable "{{ var_name }}" {
+  default = {{ var_value | tf_value }}
+}
+
+{% endfor %}
+{% endif %}
 """
+
+# Per-resource-type templates, dispatched by a dict lookup instead of an if/elif chain
+_S3_TMPL_STR = """resource "aws_s3_bucket" "{{ resource_id }}" {
+  bucket = "{{ config_data.get("bucket_name", resource_id) }}"
+}
+
+"""
+
+_LAMBDA_TMPL_STR = """resource "aws_lambda_function" "{{ resource_id }}" {
+  function_name = "{{ config_data.get("function_name", resource_id) }}"
+  runtime = "{{ config_data.get("runtime", "python3.9") }}"
+  handler = "{{ config_data.get("handler", "index.handler") }}"
+  filename = "lambda.zip"
+  source_code_hash = filebase64sha256("lambda.zip")
+}
+
+"""
+
+_VPC_TMPL_STR = """resource "aws_vpc" "{{ resource_id }}" {
+  cidr_block = "{{ config_data.get("cidr_block", "10.0.0.0/16") }}"
+  tags = {
+    Name = "{{ config_data.get("name", resource_id) }}"
+  }
+}
+
+"""
+
+_SECURITY_GROUP_TMPL_STR = """resource "aws_security_group" "{{ resource_id }}" {
+  name = "{{ config_data.get("name", resource_id) }}"
+  vpc_id = {{ config_data.get("vpc_id", "aws_vpc.main.id") }}
+}
+
+"""
+
+
+def _tf_value(value: Any) -> str:
+    """Render a Python value as an HCL variable default"""
+    if isinstance(value, str):
+        return f'"{value}"'
+    return json.dumps(value)
+
+
+# Compiled once at import time and reused for every render; the bytecode cache lets later
+# processes skip template compilation (entries are keyed by source checksum, so never stale)
+_JINJA_CACHE_DIR = os.path.join(tempfile.gettempdir(), "vivify-jinja-cache")
+os.makedirs(_JINJA_CACHE_DIR, exist_ok=True)
+_ENV = jinja2.Environment(
+    bytecode_cache=jinja2.FileSystemBytecodeCache(_JINJA_CACHE_DIR),
+    loader=jinja2.DictLoader({
+        "main.tf.j2": TEMPLATE_STR,
+        "s3.tf.j2": _S3_TMPL_STR,
+        "lambda.tf.j2": _LAMBDA_TMPL_STR,
+        "vpc.tf.j2": _VPC_TMPL_STR,
+        "security_group.tf.j2": _SECURITY_GROUP_TMPL_STR
+    }),
+    autoescape=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True
+)
+_ENV.filters["tf_value"] = _tf_value
+_ENV.globals["localstack_provider_block"] = _LOCALSTACK_PROVIDER_BLOCK
+_TEMPLATE = _ENV.get_template("main.tf.j2")
+
+# Resource type -> template
+_TEMPLATES = {
+    resource_type: _ENV.get_template(f"{resource_type}.tf.j2")
+    for resource_type in ("s3", "lambda", "vpc", "security_group")
+}
+
+
+@functools.cache
+def _terraform_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Worker pool shared by every TerraformService, created on first use
+    
+    Workers are started with forkserver (spawn where unavailable) rather than fork, since the
+    API process already runs threads whose locks a forked child would inherit mid-state.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=4,
+        mp_context=multiprocessing.get_context(method)
+    )
+
+
+def shutdown_terraform_pool():
+    """Shut down the terraform worker pool if it was started (called on application shutdown)"""
+    if _terraform_pool.cache_info().currsize:
+        _terraform_pool().shutdown(wait=False, cancel_futures=True)
+        _terraform_pool.cache_clear()
+
+
+def _run_terraform_in_subprocess(
+    workspace_path: str,
+    args: List[str],
+    timeout: float,
+    env: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Run terraform and reduce its -json event stream to a small summary (runs in a worker process)"""
+    summary: Dict[str, Any] = {"add": 0, "change": 0, "remove": 0}
+    diagnostics: List[str] = []
+    tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    
+    # Stream stdout line by line so memory stays flat however large the plan is;
+    # stderr is small and goes to a temp file so neither pipe can fill up and stall
+    with tempfile.TemporaryFile() as stderr_file:
+        proc = subprocess.Popen(
+            ["terraform", f"-chdir={workspace_path}", *args],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            text=True
+        )
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    event = None
+                if not isinstance(event, dict):
+                    # Plain-text output (e.g. terraform init)
+                    tail.append(line.rstrip("\n"))
+                    continue
+                
+                message = event.get("@message", "")
+                tail.append(message)
+                if event.get("type") == "change_summary":
+                    summary.update(event.get("changes", {}))
+                elif event.get("type") == "diagnostic" and event.get("@level") == "error":
+                    diagnostics.append(message)
+            returncode = proc.wait()
+        finally:
+            timed_out = not timer.is_alive()
+            timer.cancel()
+            # On any error in the read loop, never leave the child running or unreaped
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            proc.stdout.close()
         
-        # Add endpoint for LocalStack if needed
-        if os.getenv("AWS_PROVIDER", "localstack") == "localstack":
-            config += '  endpoints {\n'
-            config += '    s3 = "http://localhost:4566"\n'
-            config += '    ec2 = "http://localhost:4566"\n'
-            config += '    lambda = "http://localhost:4566"\n'
-            config += '    iam = "http://localhost:4566"\n'
-            config += '  }\n'
-            config += '  skip_credentials_validation = true\n'
-            config += '  skip_metadata_api_check = true\n'
-            config += '  skip_region_validation = true\n'
+        if timed_out:
+            raise TimeoutError(f"terraform {args[0]} timed out after {timeout} seconds")
         
-        config += "}\n\n"
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode(errors="replace")
+    
+    return {
+        "success": returncode == 0,
+        "output": _clip("\n".join(tail)),
+        "summary": summary,
+        "error": _clip(stderr or "\n".join(diagnostics))
+    }
+
+
+class TerraformService:
+    """Service for Terraform operations"""
+    
+    def __init__(self, work_dir: Optional[str] = None):
+        self.work_dir = work_dir or os.path.join(tempfile.gettempdir(), "terraform_workspaces")
+        os.makedirs(self.work_dir, exist_ok=True)
+        self._is_localstack = os.getenv("AWS_PROVIDER", "localstack") == "localstack"
         
-        # Add variables
-        if variables:
-            config += "variable \"aws_region\" {\n"
-            config += '  default = "us-east-1"\n'
-            config += "}\n\n"
-            
-            for var_name, var_value in variables.items():
-                if var_name != "aws_region":
-                    config += f'variable "{var_name}" {{\n'
-                    if isinstance(var_value, str):
-                        config += f'  default = "{var_value}"\n'
-                    else:
-                        config += f'  default = {json.dumps(var_value)}\n'
-                    config += "}\n\n"
+        # Shared provider cache and the environment every terraform command runs with
+        self._plugin_cache, self._env = _terraform_env(self.work_dir)
         
-        # Generate resources
-        for resource in resources:
-            resource_type = resource.get("type")
-            resource_id = resource.get("id", "resource")
-            config_data = resource.get("config", {})
-            
-            if resource_type == "s3":
-                config += f'resource "aws_s3_bucket" "{resource_id}" {{\n'
-                config += f'  bucket = "{config_data.get("bucket_name", resource_id)}"\n'
-                config += "}\n\n"
-            
-            elif resource_type == "lambda":
-                config += f'resource "aws_lambda_function" "{resource_id}" {{\n'
-                config += f'  function_name = "{config_data.get("function_name", resource_id)}"\n'
-                config += f'  runtime = "{config_data.get("runtime", "python3.9")}"\n'
-                config += f'  handler = "{config_data.get("handler", "index.handler")}"\n'
-                config += '  filename = "lambda.zip"\n'
-                config += '  source_code_hash = filebase64sha256("lambda.zip")\n'
-                config += "}\n\n"
-            
-            elif resource_type == "vpc":
-                config += f'resource "aws_vpc" "{resource_id}" {{\n'
-                config += f'  cidr_block = "{config_data.get("cidr_block", "10.0.0.0/16")}"\n'
-                config += f'  tags = {{\n'
-                config += f'    Name = "{config_data.get("name", resource_id)}"\n'
-                config += '  }\n'
-                config += "}\n\n"
-            
-            elif resource_type == "security_group":
-                config += f'resource "aws_security_group" "{resource_id}" {{\n'
-                config += f'  name = "{config_data.get("name", resource_id)}"\n'
-                config += f'  vpc_id = {config_data.get("vpc_id", "aws_vpc.main.id")}\n'
-                config += "}\n\n"
+        # Workspaces already initialized by this process; init is skipped for them
+        self._initialized: Set[str] = set()
         
-        return config
+        # Finish deleting workspaces a previous process renamed aside but never removed
+        _sweep_trash(self.work_dir)
+    
+    def generate_terraform_config(
+        self,
+        resources: List[Dict[str, Any]],
+        variables: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Generate Terraform configuration from resource definitions"""
+        parts = [_TEMPLATE.render(variables=variables, localstack=self._is_localstack)]
+        for resource in resources:
+            tmpl = _TEMPLATES.get(resource.get("type"))
+            if tmpl is not None:
+                parts.append(tmpl.render(
+                    resource_id=resource.get("id", "resource"),
+                    config_data=resource.get("config", {})
+                ))
+        return "".join(parts)
     
     def create_workspace(self, stack_name: str) -> str:
         """Create a Terraform workspace directory"""
@@ -110,37 +256,37 @@ provider "aws" {
         os.makedirs(workspace_path, exist_ok=True)
         return workspace_path
     
-    def init_terraform(self, workspace_path: str) -> bool:
-        """Initialize Terraform in workspace"""
+    async def _run_terraform(self, args: List[str], workspace_path: str, timeout: float) -> Dict[str, Any]:
+        """Run a terraform command in the shared worker pool without blocking the event loop
+        
+        Runs and their output parsing happen off the event loop's process.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _terraform_pool(), _run_terraform_in_subprocess, workspace_path, args, timeout, self._env
+        )
+    
+    async def init_terraform(self, workspace_path: str) -> bool:
+        """Initialize Terraform in workspace (once per workspace per process)"""
+        if workspace_path in self._initialized and os.path.isdir(os.path.join(workspace_path, ".terraform")):
+            return True
         try:
-            result = subprocess.run(
-                ["terraform", "init"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            return result.returncode == 0
+            result = await self._run_terraform(["init", "-input=false"], workspace_path, timeout=60)
+            if result["success"]:
+                self._initialized.add(workspace_path)
+            return result["success"]
         except Exception as e:
             logger.error(f"Terraform init failed: {str(e)}")
             return False
     
-    def plan_terraform(self, workspace_path: str) -> Dict[str, Any]:
+    async def plan_terraform(self, workspace_path: str) -> Dict[str, Any]:
         """Run terraform plan"""
         try:
-            result = subprocess.run(
-                ["terraform", "plan", "-out=tfplan", "-json"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
+            return await self._run_terraform(
+                ["plan", "-input=false", "-lock-timeout=60s", "-out=tfplan", "-json"],
+                workspace_path,
                 timeout=300
             )
-            
-            return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr
-            }
         except Exception as e:
             logger.error(f"Terraform plan failed: {str(e)}")
             return {
@@ -148,22 +294,14 @@ provider "aws" {
                 "error": str(e)
             }
     
-    def apply_terraform(self, workspace_path: str) -> Dict[str, Any]:
+    async def apply_terraform(self, workspace_path: str) -> Dict[str, Any]:
         """Run terraform apply"""
         try:
-            result = subprocess.run(
-                ["terraform", "apply", "-auto-approve", "-json"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
+            return await self._run_terraform(
+                ["apply", "-auto-approve", "-input=false", "-lock-timeout=60s", "-json"],
+                workspace_path,
                 timeout=600
             )
-            
-            return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr
-            }
         except Exception as e:
             logger.error(f"Terraform apply failed: {str(e)}")
             return {
@@ -171,22 +309,14 @@ provider "aws" {
                 "error": str(e)
             }
     
-    def destroy_terraform(self, workspace_path: str) -> Dict[str, Any]:
+    async def destroy_terraform(self, workspace_path: str) -> Dict[str, Any]:
         """Run terraform destroy"""
         try:
-            result = subprocess.run(
-                ["terraform", "destroy", "-auto-approve", "-json"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
+            return await self._run_terraform(
+                ["destroy", "-auto-approve", "-input=false", "-lock-timeout=60s", "-json"],
+                workspace_path,
                 timeout=600
             )
-            
-            return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr
-            }
         except Exception as e:
             logger.error(f"Terraform destroy failed: {str(e)}")
             return {
@@ -194,24 +324,29 @@ provider "aws" {
                 "error": str(e)
             }
     
-    def detect_drift(self, workspace_path: str) -> Dict[str, Any]:
-        """Detect Terraform drift"""
-        plan_result = self.plan_terraform(workspace_path)
-        
-        # Parse plan output to detect changes
-        has_drift = False
-        if plan_result["success"]:
-            # Simple check - if plan shows changes, there's drift
-            output = plan_result.get("output", "")
-            has_drift = "No changes" not in output
+    async def detect_drift(self, workspace_path: str) -> Dict[str, Any]:
+        """Detect Terraform drift from the plan's change_summary event"""
+        plan_result = await self.plan_terraform(workspace_path)
+        if not plan_result["success"]:
+            return {
+                "has_drift": False,
+                "summary": {},
+                "error": plan_result.get("error")
+            }
         
+        # Any planned add/change/remove means the live state has drifted from config
+        summary = plan_result.get("summary", {})
         return {
-            "has_drift": has_drift,
-            "plan_result": plan_result
+            "has_drift": any(summary.get(key, 0) > 0 for key in ("add", "change", "remove")),
+            "summary": summary
         }
     
-    def cleanup_workspace(self, workspace_path: str):
-        """Clean up workspace directory"""
-        if os.path.exists(workspace_path):
-            shutil.rmtree(workspace_path)
+    async def cleanup_workspace(self, workspace_path: str):
+        """Clean up workspace directory without blocking the event loop
+        
+        The workspace is renamed aside so its name is free at once, and the
+        tree is deleted in the background by the cleanup pool.
+        """
+        self._initialized.discard(workspace_path)
+        _discard_workspace(workspace_path)
 
@@ -2,6 +2,7 @@
 
 from .terraform import GCPTerraformService
 from .deployment import GCPDeploymentService
+from .deployment_store import DeploymentStore
 
-__all__ = ["GCPTerraformService", "GCPDeploymentService"]
+__all__ = ["GCPTerraformService", "GCPDeploymentService", "DeploymentStore"]
 
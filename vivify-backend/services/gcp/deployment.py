@@ -1,20 +1,60 @@
 """Deployment service for GCP infrastructure"""
 
 import os
+import json
+import time
+import hashlib
 import asyncio
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 import logging
+import aiofiles
 from .terraform import GCPTerraformService
+from .deployment_store import DeploymentStore
 
 logger = logging.getLogger(__name__)
 
+# Write buffer size used for Terraform files written to the workspace
+_WRITE_BUFFER_SIZE = 1 << 16
+
+# Default seconds a drift result stays fresh before Terraform is re-run
+DEFAULT_DRIFT_INTERVAL = 300.0
+
+# Recommended drift polling interval: doubles on each clean check, capped
+DRIFT_POLL_BASE_SECONDS = 30
+DRIFT_POLL_MAX_SECONDS = 900
+
+# Pauses between drift plans while GCP is still converging; the final plan is used as-is
+DRIFT_CONSISTENCY_DELAYS = (0.5, 1, 2, 4)
+
+# Plan messages that mean a resource is still settling rather than drifted
+_TRANSIENT_PLAN_MARKERS = ("not yet available", "still creating", "not ready")
+
+# Deployment records kept in memory; the rest are read back from the store on demand
+HOT_DEPLOYMENTS_MAX = 256
+
+
+def _is_stable(plan_result: Dict[str, Any]) -> bool:
+    """Whether a plan result is free of transient eventual-consistency errors"""
+    text = f"{plan_result.get('output') or ''}\n{plan_result.get('error') or ''}".lower()
+    return not any(marker in text for marker in _TRANSIENT_PLAN_MARKERS)
+
 
 class GCPDeploymentService:
     """Service for deploying GCP infrastructure"""
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None):
         self.terraform = GCPTerraformService()
-        self.active_deployments: Dict[str, Dict[str, Any]] = {}
+        # Deployments are persisted so rollback and drift checks survive a restart;
+        # active_deployments is a bounded LRU hot tier in front of the store
+        self.store = DeploymentStore(db_path or os.path.join(self.terraform.work_dir, "deployments.db"))
+        self.active_deployments: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._drift_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bound concurrent terraform runs across stacks; per-stack locks stop a stack overlapping itself
+        self._tf_sem = asyncio.Semaphore(int(os.getenv("VIVIFY_TF_PARALLEL", "4")))
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._clean_streak: Dict[str, int] = {}
     
     async def deploy_stack(
         self,
@@ -23,34 +63,91 @@ class GCPDeploymentService:
         project_id: str,
         variables: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Deploy a Terraform stack to GCP"""
+        """Deploy a Terraform stack to GCP
+        
+        Concurrent calls for the same stack_name share the first call's result
+        instead of racing on the same workspace.
+        """
+        # No await between the lookup and the insert, so this is atomic on the loop
+        inflight = self._inflight.get(stack_name)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[stack_name] = future
+        try:
+            lock = self._locks.setdefault(stack_name, asyncio.Lock())
+            async with lock, self._tf_sem:
+                result = await self._deploy_stack(stack_name, terraform_config, project_id, variables)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._inflight[stack_name]
+    
+    async def _deploy_stack(
+        self,
+        stack_name: str,
+        terraform_config: str,
+        project_id: str,
+        variables: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Write, init, plan and apply a stack's workspace"""
         
         try:
             # Create workspace
             workspace_path = self.terraform.create_workspace(stack_name)
             
-            # Write Terraform config
-            with open(os.path.join(workspace_path, "main.tf"), "w") as f:
-                f.write(terraform_config)
+            # Hash config and variables as they are written, to detect unchanged re-deploys
+            config_hash = hashlib.blake2b(digest_size=16)
             
-            # Write variables if provided
-            if variables:
-                with open(os.path.join(workspace_path, "terraform.tfvars"), "w") as f:
-                    for key, value in variables.items():
-                        if isinstance(value, str):
-                            f.write(f'{key} = "{value}"\n')
-                        else:
-                            f.write(f'{key} = {value}\n')
+            async def write_config():
+                # Write Terraform config
+                path = os.path.join(workspace_path, "main.tf")
+                async with aiofiles.open(path, "w", buffering=_WRITE_BUFFER_SIZE) as f:
+                    await f.write(terraform_config)
+                config_hash.update(terraform_config.encode())
+            
+            async def write_variables():
+                # Write variables if provided
+                if not variables:
+                    return
+                path = os.path.join(workspace_path, "terraform.tfvars")
+                async with aiofiles.open(path, "w", buffering=_WRITE_BUFFER_SIZE) as f:
+                    # JSON literals are valid HCL for strings, numbers, bools, lists and maps
+                    await f.write("".join(f"{key} = {json.dumps(value)}\n" for key, value in variables.items()))
+            
+            await asyncio.gather(write_config(), write_variables())
+            config_hash.update(json.dumps(variables or {}, sort_keys=True, default=str).encode())
+            config_hash = config_hash.hexdigest()
+            
+            # Skip init/plan/apply when this exact config is already deployed
+            deployment = await self._get_deployment(stack_name)
+            if deployment and deployment["status"] == "deployed" and deployment.get("config_hash") == config_hash:
+                return {
+                    "success": True,
+                    "stack_name": stack_name,
+                    "cached": True,
+                    "output": None,
+                    "error": None
+                }
             
             # Initialize
-            if not self.terraform.init_terraform(workspace_path):
+            if not await self.terraform.init_terraform_async(workspace_path):
                 return {
                     "success": False,
                     "error": "Terraform initialization failed"
                 }
             
             # Plan
-            plan_result = self.terraform.plan_terraform(workspace_path)
+            plan_result = await self.terraform.plan_terraform_async(workspace_path)
             if not plan_result["success"]:
                 return {
                     "success": False,
@@ -58,13 +155,17 @@ class GCPDeploymentService:
                 }
             
             # Apply
-            apply_result = self.terraform.apply_terraform(workspace_path)
+            apply_result = await self.terraform.apply_terraform_async(workspace_path)
             
-            self.active_deployments[stack_name] = {
+            await self._set_deployment(stack_name, {
                 "workspace_path": workspace_path,
                 "status": "deployed" if apply_result["success"] else "failed",
-                "project_id": project_id
-            }
+                "project_id": project_id,
+                "drift_interval": DEFAULT_DRIFT_INTERVAL,
+                "config_hash": config_hash
+            })
+            self._drift_cache.pop(stack_name, None)
+            self._clean_streak.pop(stack_name, None)
             
             return {
                 "success": apply_result["success"],
@@ -80,20 +181,80 @@ class GCPDeploymentService:
                 "error": str(e)
             }
     
-    async def detect_drift(self, stack_name: str) -> Dict[str, Any]:
-        """Detect drift in deployed stack with consistency wait"""
+    async def list_stacks(self, status: Optional[str] = None) -> List[str]:
+        """List tracked stack names, optionally only those with the given status"""
+        return await asyncio.to_thread(self.store.list_stacks, status)
+    
+    async def _get_deployment(self, stack_name: str) -> Optional[Dict[str, Any]]:
+        """Look up a deployment, falling back to the store on a hot-tier miss"""
+        deployment = self.active_deployments.get(stack_name)
+        if deployment is not None:
+            self.active_deployments.move_to_end(stack_name)
+            return deployment
+        
+        deployment = await asyncio.to_thread(self.store.get, stack_name)
+        if deployment is not None:
+            self._cache_deployment(stack_name, deployment)
+        return deployment
+    
+    def _cache_deployment(self, stack_name: str, deployment: Dict[str, Any]):
+        """Put a deployment in the hot tier, evicting the least recently used"""
+        self.active_deployments[stack_name] = deployment
+        self.active_deployments.move_to_end(stack_name)
+        while len(self.active_deployments) > HOT_DEPLOYMENTS_MAX:
+            self.active_deployments.popitem(last=False)
+    
+    async def _set_deployment(self, stack_name: str, deployment: Dict[str, Any]):
+        """Record a deployment (write-through to the store)"""
+        await asyncio.to_thread(self.store.put, stack_name, deployment)
+        self._cache_deployment(stack_name, deployment)
+    
+    async def _remove_deployment(self, stack_name: str):
+        """Forget a deployment in memory and in the store"""
+        self.active_deployments.pop(stack_name, None)
+        await asyncio.to_thread(self.store.delete, stack_name)
+    
+    async def detect_drift(self, stack_name: str, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Detect drift in deployed stack with consistency wait
+        
+        Results are cached per stack for max_age seconds (defaults to the
+        stack's drift_interval); pass max_age=0 to force a fresh check.
+        """
         try:
-            if stack_name not in self.active_deployments:
+            deployment = await self._get_deployment(stack_name)
+            if deployment is None:
                 return {"has_drift": False, "error": "Stack not found"}
             
-            workspace_path = self.active_deployments[stack_name]["workspace_path"]
+            if max_age is None:
+                max_age = deployment.get("drift_interval", DEFAULT_DRIFT_INTERVAL)
             
-            # Consistency wait: GCP APIs have latency, resource might take 5-10 seconds to appear
-            # Wait before checking drift to ensure API consistency
-            await asyncio.sleep(5)
+            cached = self._drift_cache.get(stack_name)
+            if cached and time.monotonic() - cached[0] < max_age:
+                return cached[1]
             
-            # Run terraform plan to detect drift
-            drift_result = self.terraform.detect_drift(workspace_path)
+            workspace_path = deployment["workspace_path"]
+            
+            # GCP APIs are eventually consistent: plan right away and only back off
+            # and re-plan while the plan still reports resources as settling
+            for delay in (*DRIFT_CONSISTENCY_DELAYS, None):
+                plan_result = await self.terraform.drift_plan_async(workspace_path)
+                if delay is None or _is_stable(plan_result):
+                    break
+                await asyncio.sleep(delay)
+            
+            drift_result = await self.terraform.drift_from_plan(workspace_path, plan_result)
+            
+            if drift_result.get("plan_result", {}).get("success"):
+                # Back off polling while the stack stays clean; reset on drift
+                if drift_result["has_drift"]:
+                    streak = self._clean_streak[stack_name] = 0
+                else:
+                    streak = self._clean_streak[stack_name] = self._clean_streak.get(stack_name, 0) + 1
+                drift_result["next_poll_seconds"] = min(
+                    DRIFT_POLL_BASE_SECONDS * 2 ** streak,
+                    DRIFT_POLL_MAX_SECONDS
+                )
+                self._drift_cache[stack_name] = (time.monotonic(), drift_result)
             
             return drift_result
             
@@ -104,15 +265,20 @@ class GCPDeploymentService:
     async def rollback_stack(self, stack_name: str) -> Dict[str, Any]:
         """Rollback (destroy) a stack"""
         try:
-            if stack_name not in self.active_deployments:
+            deployment = await self._get_deployment(stack_name)
+            if deployment is None:
                 return {"success": False, "error": "Stack not found"}
             
-            workspace_path = self.active_deployments[stack_name]["workspace_path"]
-            destroy_result = self.terraform.destroy_terraform(workspace_path)
-            
-            if destroy_result["success"]:
-                del self.active_deployments[stack_name]
-                self.terraform.cleanup_workspace(workspace_path)
+            workspace_path = deployment["workspace_path"]
+            lock = self._locks.setdefault(stack_name, asyncio.Lock())
+            async with lock, self._tf_sem:
+                destroy_result = await self.terraform.destroy_terraform_async(workspace_path)
+                
+                if destroy_result["success"]:
+                    await self._remove_deployment(stack_name)
+                    self._drift_cache.pop(stack_name, None)
+                    self._clean_streak.pop(stack_name, None)
+                    await self.terraform.cleanup_workspace(workspace_path)
             
             return destroy_result
             
@@ -0,0 +1,84 @@
+"""SQLite-backed store for GCP deployment records"""
+
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DeploymentStore:
+    """Persists deployment records so stacks survive a server restart
+    
+    Methods are blocking; async callers should run them via asyncio.to_thread.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS deployments (
+                    stack_name TEXT PRIMARY KEY,
+                    workspace_path TEXT NOT NULL,
+                    project_id TEXT,
+                    status TEXT NOT NULL,
+                    drift_interval REAL,
+                    config_hash TEXT
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_deployments_status ON deployments(status)"
+            )
+    
+    def get(self, stack_name: str) -> Optional[Dict[str, Any]]:
+        """Load a deployment record, or None if the stack is unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT workspace_path, project_id, status, drift_interval, config_hash "
+                "FROM deployments WHERE stack_name = ?",
+                (stack_name,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+    
+    def put(self, stack_name: str, deployment: Dict[str, Any]):
+        """Insert or replace a deployment record"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO deployments "
+                "(stack_name, workspace_path, project_id, status, drift_interval, config_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    stack_name,
+                    deployment["workspace_path"],
+                    deployment.get("project_id"),
+                    deployment["status"],
+                    deployment.get("drift_interval"),
+                    deployment.get("config_hash")
+                )
+            )
+    
+    def delete(self, stack_name: str):
+        """Remove a deployment record"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM deployments WHERE stack_name = ?", (stack_name,))
+    
+    def list_stacks(self, status: Optional[str] = None) -> List[str]:
+        """List stack names, optionally only those with the given status"""
+        with self._lock:
+            if status is None:
+                rows = self._conn.execute("SELECT stack_name FROM deployments").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT stack_name FROM deployments WHERE status = ?",
+                    (status,)
+                ).fetchall()
+        return [row["stack_name"] for row in rows]
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -2,15 +2,189 @@
 
 import os
 import json
-import subprocess
+import hashlib
+import asyncio
 import tempfile
-import shutil
-from typing import Dict, Any, Optional, List
+from collections import deque
+from typing import Dict, Any, Optional, List, Set, Tuple
 import logging
 from pathlib import Path
+import jinja2
+from services._terraform import _clip, _discard_workspace, _sweep_trash, _terraform_env
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    # orjson is optional; fall back to the stdlib parser
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Lines of streamed terraform output kept in memory for API responses
+OUTPUT_TAIL_LINES = 200
+
+# Size budget for rendered configs cached on disk; least recently used are evicted first
+CONFIG_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Digest of this module's source, folded into every config cache key. The cache directory
+# outlives upgrades, so any edit to the templates or the render code must miss old entries.
+_RENDER_DIGEST = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=16).hexdigest()
+
+# Terraform's own default for concurrent resource operations
+DEFAULT_PARALLELISM = 10
+
+# Plan file written by drift checks, kept apart from the tfplan that deploys apply
+DRIFT_PLAN_FILE = "drift.tfplan"
+
+# Plan actions that do not change a managed resource
+_NO_CHANGE_ACTIONS = (["no-op"], ["read"])
+
+
+def _tf_value(value: Any) -> str:
+    """Render a Python value as an HCL variable default"""
+    if isinstance(value, str):
+        return f'"{value}"'
+    return json.dumps(value)
+
+
+# Templates are compiled once at import time and reused for every render
+_ENV = jinja2.Environment(
+    autoescape=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True
+)
+_ENV.filters["tf_value"] = _tf_value
+
+_HEADER_TMPL = _ENV.from_string("""terraform {
+  required_providers {
+    google = {
+      source  = "hashicorp/google"
+      version = "~> 5.0"
+    }
+  }
+}
+
+provider "google" {
+  project = "{{ project_id }}"
+  region  = var.gcp_region
+}
+
+variable "gcp_region" {
+  default = "{{ variables.get("gcp_region", "us-central1") }}"
+}
+
+{% for var_name, var_value in variables.items() if var_name != "gcp_region" %}
+variable "{{ var_name }}" {
+  default = {{ var_value | tf_value }}
+}
+
+{% endfor %}
+""")
+
+# GCP requires globally unique bucket names, so they are prefixed with vivify-
+_BUCKET_TMPL = _ENV.from_string("""{% set bucket_name = config.get("bucket_name", resource_id) %}
+{% if not bucket_name.startswith("vivify-") %}
+{% set bucket_name = "vivify-" ~ bucket_name %}
+{% endif %}
+resource "google_storage_bucket" "{{ resource_id }}" {
+  name     = "{{ bucket_name }}"
+  location = "{{ config.get("location", "US") }}"
+{% if config.get("storage_class") %}
+  storage_class = "{{ config["storage_class"] }}"
+{% endif %}
+  uniform_bucket_level_access = true
+}
+
+""")
+
+_PUBSUB_TOPIC_TMPL = _ENV.from_string("""resource "google_pubsub_topic" "{{ resource_id }}" {
+  name = "{{ config.get("name", resource_id) }}"
+}
+
+""")
+
+_COMPUTE_INSTANCE_TMPL = _ENV.from_string("""resource "google_compute_instance" "{{ resource_id }}" {
+  name         = "{{ config.get("name", resource_id) }}"
+  machine_type = "{{ config.get("machine_type", "e2-micro") }}"
+  zone         = "{{ config.get("zone", "us-central1-a") }}"
+  boot_disk {
+    initialize_params {
+      image = "debian-cloud/debian-11"
+    }
+  }
+  network_interface {
+    network = "default"
+    access_config {
+    }
+  }
+}
+
+""")
+
+_COMPUTE_NETWORK_TMPL = _ENV.from_string("""resource "google_compute_network" "{{ resource_id }}" {
+  name                    = "{{ config.get("name", resource_id) }}"
+  auto_create_subnetworks = {{ config.get("auto_create_subnetworks", False) | string | lower }}
+}
+
+""")
+
+_CLOUDFUNCTION_TMPL = _ENV.from_string("""resource "google_cloudfunctions_function" "{{ resource_id }}" {
+  name        = "{{ config.get("name", resource_id) }}"
+  runtime     = "{{ config.get("runtime", "python39") }}"
+  entry_point = "{{ config.get("entry_point", "hello_world") }}"
+  source_archive_bucket = google_storage_bucket.function_source.name
+  source_archive_object = "function.zip"
+  trigger {
+    http_trigger {}
+  }
+}
+
+""")
+
+# Resource type (including AWS-style aliases) -> template
+_TEMPLATES = {
+    "google_storage_bucket": _BUCKET_TMPL,
+    "s3": _BUCKET_TMPL,
+    "google_pubsub_topic": _PUBSUB_TOPIC_TMPL,
+    "pubsub_topic": _PUBSUB_TOPIC_TMPL,
+    "google_compute_instance": _COMPUTE_INSTANCE_TMPL,
+    "google_compute_network": _COMPUTE_NETWORK_TMPL,
+    "vpc": _COMPUTE_NETWORK_TMPL,
+    "google_cloudfunctions_function": _CLOUDFUNCTION_TMPL,
+    "lambda": _CLOUDFUNCTION_TMPL,
+}
+
+
+def _run_flags(
+    parallelism: int,
+    refresh: bool = True,
+    targets: Optional[List[str]] = None
+) -> List[str]:
+    """Tuning flags shared by plan, apply and destroy"""
+    flags = [f"-parallelism={parallelism}"]
+    if not refresh:
+        flags.append("-refresh=false")
+    if targets:
+        flags.extend(f"-target={target}" for target in targets)
+    return flags
+
+
+def _clipped(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Clip a terraform result's output and error text"""
+    return {**result, "output": _clip(result.get("output")), "error": _clip(result.get("error"))}
+
+
+async def _reap(proc: asyncio.subprocess.Process):
+    """Kill a terraform child that is still running and wait for it to exit"""
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+    await proc.wait()
+
 
 class GCPTerraformService:
     """Service for GCP Terraform operations"""
@@ -18,6 +192,19 @@ class GCPTerraformService:
     def __init__(self, work_dir: Optional[str] = None):
         self.work_dir = work_dir or os.path.join(tempfile.gettempdir(), "terraform_workspaces_gcp")
         os.makedirs(self.work_dir, exist_ok=True)
+        
+        # Shared provider cache and the environment every terraform command runs with
+        self._plugin_cache, self._env = _terraform_env(self.work_dir)
+        
+        # Rendered configs keyed by a hash of their inputs
+        self._config_cache_dir = os.path.join(self.work_dir, ".config-cache")
+        os.makedirs(self._config_cache_dir, exist_ok=True)
+        
+        # Workspaces already initialized by this process; init is skipped for them
+        self._initialized: Set[str] = set()
+        
+        # Finish deleting workspaces a previous process renamed aside but never removed
+        _sweep_trash(self.work_dir)
     
     def generate_terraform_config(
         self,
@@ -25,105 +212,78 @@ class GCPTerraformService:
         project_id: str,
         variables: Optional[Dict[str, Any]] = None
     ) -> str:
-        """Generate Terraform configuration for GCP resources"""
+        """Generate Terraform configuration for GCP resources (memoized on disk by input hash)"""
+        key = hashlib.blake2b(
+            json.dumps(
+                {"t": _RENDER_DIGEST, "r": resources, "p": project_id, "v": variables},
+                sort_keys=True,
+                default=str
+            ).encode()
+        ).hexdigest()
+        path = os.path.join(self._config_cache_dir, key + ".tf")
         
-        config = f"""terraform {{
-  required_providers {{
-    google = {{
-      source  = "hashicorp/google"
-      version = "~> 5.0"
-    }}
-  }}
-}}
-
-provider "google" {{
-  project = "{project_id}"
-  region  = var.gcp_region
-}}
-"""
-        
-        # Add variables
-        if variables:
-            config += "\nvariable \"gcp_region\" {\n"
-            config += f'  default = "{variables.get("gcp_region", "us-central1")}"\n'
-            config += "}\n\n"
-            
-            for var_name, var_value in variables.items():
-                if var_name != "gcp_region":
-                    config += f'variable "{var_name}" {{\n'
-                    if isinstance(var_value, str):
-                        config += f'  default = "{var_value}"\n'
-                    else:
-                        config += f'  default = {json.dumps(var_value)}\n'
-                    config += "}\n\n"
-        else:
-            config += "\nvariable \"gcp_region\" {\n"
-            config += '  default = "us-central1"\n'
-            config += "}\n\n"
+        try:
+            with open(path) as f:
+                config = f.read()
+            # Touch so eviction sees this entry as recently used
+            os.utime(path)
+            return config
+        except FileNotFoundError:
+            pass
+        
+        config = self._render_terraform_config(resources, project_id, variables)
+        try:
+            # Write to a temp file and rename so readers never see a partial config
+            with tempfile.NamedTemporaryFile("w", dir=self._config_cache_dir, suffix=".tmp", delete=False) as f:
+                f.write(config)
+            os.replace(f.name, path)
+            self._evict_config_cache()
+        except OSError as e:
+            logger.warning(f"Could not cache Terraform config: {str(e)}")
+        return config
+    
+    def _evict_config_cache(self):
+        """Drop least recently used cached configs until the cache fits its size budget"""
+        entries = []
+        total = 0
+        with os.scandir(self._config_cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".tf"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        if total <= CONFIG_CACHE_MAX_BYTES:
+            return
+        
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= CONFIG_CACHE_MAX_BYTES:
+                break
+    
+    def _render_terraform_config(
+        self,
+        resources: List[Dict[str, Any]],
+        project_id: str,
+        variables: Optional[Dict[str, Any]]
+    ) -> str:
+        """Render Terraform configuration for GCP resources"""
+        parts = [_HEADER_TMPL.render(project_id=project_id, variables=variables or {})]
         
         # Generate resources - prioritize google_storage_bucket and google_pubsub_topic
         for resource in resources:
-            resource_type = resource.get("type", "")
-            resource_id = resource.get("id", "resource")
-            config_data = resource.get("config", {})
-            
-            if resource_type == "google_storage_bucket" or resource_type == "s3":
-                # Map s3 to google_storage_bucket for compatibility
-                bucket_name = config_data.get("bucket_name", resource_id)
-                # Ensure unique bucket name (GCP requires globally unique names)
-                if not bucket_name.startswith("vivify-"):
-                    bucket_name = f"vivify-{bucket_name}"
-                
-                config += f'resource "google_storage_bucket" "{resource_id}" {{\n'
-                config += f'  name     = "{bucket_name}"\n'
-                config += f'  location = "{config_data.get("location", "US")}"\n'
-                if config_data.get("storage_class"):
-                    config += f'  storage_class = "{config_data["storage_class"]}"\n'
-                # Add uniform bucket-level access for security
-                config += '  uniform_bucket_level_access = true\n'
-                config += "}\n\n"
-            
-            elif resource_type == "google_pubsub_topic" or resource_type == "pubsub_topic":
-                config += f'resource "google_pubsub_topic" "{resource_id}" {{\n'
-                config += f'  name = "{config_data.get("name", resource_id)}"\n'
-                config += "}\n\n"
-            
-            elif resource_type == "google_compute_instance":
-                config += f'resource "google_compute_instance" "{resource_id}" {{\n'
-                config += f'  name         = "{config_data.get("name", resource_id)}"\n'
-                config += f'  machine_type = "{config_data.get("machine_type", "e2-micro")}"\n'
-                config += f'  zone         = "{config_data.get("zone", "us-central1-a")}"\n'
-                config += '  boot_disk {\n'
-                config += '    initialize_params {\n'
-                config += '      image = "debian-cloud/debian-11"\n'
-                config += '    }\n'
-                config += '  }\n'
-                config += '  network_interface {\n'
-                config += '    network = "default"\n'
-                config += '    access_config {\n'
-                config += '    }\n'
-                config += '  }\n'
-                config += "}\n\n"
-            
-            elif resource_type == "google_compute_network" or resource_type == "vpc":
-                config += f'resource "google_compute_network" "{resource_id}" {{\n'
-                config += f'  name                    = "{config_data.get("name", resource_id)}"\n'
-                config += f'  auto_create_subnetworks = {str(config_data.get("auto_create_subnetworks", False)).lower()}\n'
-                config += "}\n\n"
-            
-            elif resource_type == "google_cloudfunctions_function" or resource_type == "lambda":
-                config += f'resource "google_cloudfunctions_function" "{resource_id}" {{\n'
-                config += f'  name        = "{config_data.get("name", resource_id)}"\n'
-                config += f'  runtime     = "{config_data.get("runtime", "python39")}"\n'
-                config += f'  entry_point = "{config_data.get("entry_point", "hello_world")}"\n'
-                config += '  source_archive_bucket = google_storage_bucket.function_source.name\n'
-                config += '  source_archive_object = "function.zip"\n'
-                config += '  trigger {\n'
-                config += '    http_trigger {}\n'
-                config += '  }\n'
-                config += "}\n\n"
+            tmpl = _TEMPLATES.get(resource.get("type", ""))
+            if tmpl is not None:
+                parts.append(tmpl.render(
+                    resource_id=resource.get("id", "resource"),
+                    config=resource.get("config", {})
+                ))
         
-        return config
+        return "".join(parts)
     
     def create_workspace(self, stack_name: str) -> str:
         """Create a Terraform workspace directory"""
@@ -131,39 +291,155 @@ provider "google" {{
         os.makedirs(workspace_path, exist_ok=True)
         return workspace_path
     
-    def init_terraform(self, workspace_path: str) -> bool:
-        """Initialize Terraform in workspace"""
+    async def _run_terraform_async(
+        self,
+        args: List[str],
+        workspace_path: str,
+        timeout: float,
+        ok_codes: Tuple[int, ...] = (0,)
+    ) -> Dict[str, Any]:
+        """Run a terraform command without blocking the event loop, keeping only the output tails"""
+        proc = await asyncio.create_subprocess_exec(
+            "terraform", f"-chdir={workspace_path}", *args,
+            env=self._env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        stderr_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        
+        async def drain(stream, tail):
+            async for line in stream:
+                tail.append(line)
+                logger.debug(f"terraform {args[0]}: {line.decode(errors='replace').rstrip()}")
+        
+        async def run():
+            await asyncio.gather(drain(proc.stdout, stdout_tail), drain(proc.stderr, stderr_tail))
+            await proc.wait()
+        
+        try:
+            await asyncio.wait_for(run(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await _reap(proc)
+            raise TimeoutError(f"terraform {args[0]} timed out after {timeout} seconds")
+        except BaseException:
+            # Cancellation or a read error: never leave the child running or unreaped
+            await _reap(proc)
+            raise
+        
+        success = proc.returncode in ok_codes
+        return {
+            "success": success,
+            "returncode": proc.returncode,
+            "output": b"".join(stdout_tail).decode(errors="replace"),
+            "error": b"".join(stderr_tail).decode(errors="replace") if not success else None
+        }
+    
+    async def _stream_terraform_async(
+        self,
+        args: List[str],
+        workspace_path: str,
+        timeout: float,
+        log_name: str
+    ) -> Dict[str, Any]:
+        """Run a terraform command, streaming output to a log file and keeping only its tail"""
+        log_path = os.path.join(workspace_path, log_name)
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        proc = await asyncio.create_subprocess_exec(
+            "terraform", f"-chdir={workspace_path}", *args,
+            env=self._env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        
+        async def pump():
+            with open(log_path, "wb") as log_file:
+                async for line in proc.stdout:
+                    log_file.write(line)
+                    tail.append(line)
+            await proc.wait()
+        
+        try:
+            await asyncio.wait_for(pump(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await _reap(proc)
+            raise TimeoutError(f"terraform {args[0]} timed out after {timeout} seconds")
+        except BaseException:
+            await _reap(proc)
+            raise
+        
+        output = b"".join(tail).decode(errors="replace")
+        return {
+            "success": proc.returncode == 0,
+            "output": output,
+            "error": output if proc.returncode != 0 else None,
+            "log_path": log_path
+        }
+    
+    async def _capture_terraform_async(
+        self,
+        args: List[str],
+        workspace_path: str,
+        timeout: float
+    ) -> Dict[str, Any]:
+        """Run a terraform command and return its complete stdout
+        
+        For machine-readable output such as show -json, which is printed as one line far
+        longer than the stream reader's line limit and must not be cut to a tail.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            "terraform", f"-chdir={workspace_path}", *args,
+            env=self._env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await _reap(proc)
+            raise TimeoutError(f"terraform {args[0]} timed out after {timeout} seconds")
+        except BaseException:
+            await _reap(proc)
+            raise
+        
+        success = proc.returncode == 0
+        return {
+            "success": success,
+            "returncode": proc.returncode,
+            "output": stdout.decode(errors="replace"),
+            "error": _clip(stderr.decode(errors="replace")) if not success else None
+        }
+    
+    async def init_terraform_async(self, workspace_path: str) -> bool:
+        """Initialize Terraform in workspace (once per workspace per process) without blocking the event loop"""
+        if workspace_path in self._initialized and os.path.isdir(os.path.join(workspace_path, ".terraform")):
+            return True
         try:
-            result = subprocess.run(
-                ["terraform", "init"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            if result.returncode != 0:
-                logger.error(f"Terraform init failed: {result.stderr}")
-            return result.returncode == 0
+            result = await self._run_terraform_async(["init", "-input=false"], workspace_path, timeout=60)
+            if result["success"]:
+                self._initialized.add(workspace_path)
+            else:
+                logger.error(f"Terraform init failed: {result['error']}")
+            return result["success"]
         except Exception as e:
             logger.error(f"Terraform init failed: {str(e)}")
             return False
     
-    def plan_terraform(self, workspace_path: str) -> Dict[str, Any]:
-        """Run terraform plan"""
+    async def plan_terraform_async(
+        self,
+        workspace_path: str,
+        refresh: bool = True,
+        parallelism: int = DEFAULT_PARALLELISM,
+        targets: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Run terraform plan without blocking the event loop"""
         try:
-            result = subprocess.run(
-                ["terraform", "plan", "-out=tfplan"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
+            return _clipped(await self._run_terraform_async(
+                ["plan", "-input=false", "-lock-timeout=60s", "-out=tfplan",
+                 *_run_flags(parallelism, refresh, targets)],
+                workspace_path,
                 timeout=300
-            )
-            
-            return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr if result.returncode != 0 else None
-            }
+            ))
         except Exception as e:
             logger.error(f"Terraform plan failed: {str(e)}")
             return {
@@ -171,22 +447,20 @@ provider "google" {{
                 "error": str(e)
             }
     
-    def apply_terraform(self, workspace_path: str) -> Dict[str, Any]:
-        """Run terraform apply"""
+    async def apply_terraform_async(
+        self,
+        workspace_path: str,
+        parallelism: int = DEFAULT_PARALLELISM
+    ) -> Dict[str, Any]:
+        """Run terraform apply without blocking the event loop"""
         try:
-            result = subprocess.run(
-                ["terraform", "apply", "-auto-approve", "tfplan"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
-                timeout=600
-            )
-            
-            return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr if result.returncode != 0 else None
-            }
+            return _clipped(await self._stream_terraform_async(
+                ["apply", "-auto-approve", "-input=false", "-lock-timeout=60s",
+                 *_run_flags(parallelism), "tfplan"],
+                workspace_path,
+                timeout=600,
+                log_name="apply.log"
+            ))
         except Exception as e:
             logger.error(f"Terraform apply failed: {str(e)}")
             return {
@@ -194,47 +468,88 @@ provider "google" {{
                 "error": str(e)
             }
     
-    def destroy_terraform(self, workspace_path: str) -> Dict[str, Any]:
-        """Run terraform destroy"""
+    async def destroy_terraform_async(
+        self,
+        workspace_path: str,
+        refresh: bool = True,
+        parallelism: int = DEFAULT_PARALLELISM,
+        targets: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Run terraform destroy without blocking the event loop"""
         try:
-            result = subprocess.run(
-                ["terraform", "destroy", "-auto-approve"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
+            return _clipped(await self._run_terraform_async(
+                ["destroy", "-auto-approve", "-input=false", "-lock-timeout=60s",
+                 *_run_flags(parallelism, refresh, targets)],
+                workspace_path,
                 timeout=600
-            )
-            
+            ))
+        except Exception as e:
+            logger.error(f"Terraform destroy failed: {str(e)}")
             return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr if result.returncode != 0 else None
+                "success": False,
+                "error": str(e)
             }
+    
+    async def drift_plan_async(
+        self,
+        workspace_path: str,
+        parallelism: int = DEFAULT_PARALLELISM
+    ) -> Dict[str, Any]:
+        """Run a refreshing drift plan; returncode 0 means no changes and 2 means drift"""
+        try:
+            return _clipped(await self._run_terraform_async(
+                ["plan", "-input=false", "-lock-timeout=60s", "-detailed-exitcode",
+                 f"-out={DRIFT_PLAN_FILE}", *_run_flags(parallelism)],
+                workspace_path,
+                timeout=300,
+                ok_codes=(0, 2)
+            ))
         except Exception as e:
-            logger.error(f"Terraform destroy failed: {str(e)}")
+            logger.error(f"Terraform drift plan failed: {str(e)}")
             return {
                 "success": False,
                 "error": str(e)
             }
     
-    def detect_drift(self, workspace_path: str) -> Dict[str, Any]:
-        """Detect Terraform drift"""
-        plan_result = self.plan_terraform(workspace_path)
-        
-        # Parse plan output to detect changes
-        has_drift = False
-        if plan_result["success"]:
-            # Simple check - if plan shows changes, there's drift
-            output = plan_result.get("output", "")
-            has_drift = "No changes" not in output and "No changes" not in output.lower()
+    async def detect_drift_async(self, workspace_path: str) -> Dict[str, Any]:
+        """Detect Terraform drift without blocking the event loop"""
+        return await self.drift_from_plan(workspace_path, await self.drift_plan_async(workspace_path))
+    
+    async def drift_from_plan(self, workspace_path: str, plan_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a drift result from a drift plan, listing drifted resources from its JSON form"""
+        has_drift = plan_result["success"] and plan_result.get("returncode") == 2
+        changes = []
+        if has_drift:
+            try:
+                show_result = await self._capture_terraform_async(
+                    ["show", "-json", DRIFT_PLAN_FILE],
+                    workspace_path,
+                    timeout=120
+                )
+                if show_result["success"]:
+                    plan = _json_loads(show_result["output"])
+                    changes = [
+                        {"address": change["address"], "actions": change["change"]["actions"]}
+                        for change in plan.get("resource_changes") or ()
+                        if change["change"]["actions"] not in _NO_CHANGE_ACTIONS
+                    ]
+                else:
+                    logger.error(f"Terraform show failed: {show_result['error']}")
+            except Exception as e:
+                logger.error(f"Terraform show failed: {str(e)}")
         
         return {
             "has_drift": has_drift,
+            "changes": changes,
             "plan_result": plan_result
         }
     
-    def cleanup_workspace(self, workspace_path: str):
-        """Clean up workspace directory"""
-        if os.path.exists(workspace_path):
-            shutil.rmtree(workspace_path)
+    async def cleanup_workspace(self, workspace_path: str):
+        """Clean up workspace directory without blocking the event loop
+        
+        The workspace is renamed aside so its name is free at once, and the
+        tree is deleted in the background by the cleanup pool.
+        """
+        self._initialized.discard(workspace_path)
+        _discard_workspace(workspace_path)
 
@@ -1,6 +1,7 @@
 """Vibe Orchestrator - Multi-agent coordination"""
 
 import asyncio
+import json
 import uuid
 from typing import Dict, List, Any, Optional, Callable
 from datetime import datetime
@@ -8,8 +9,59 @@ import logging
 from database.connection import get_db_pool
 from database.models import TaskGraph, Task, TaskDependency
 
+try:
+    import orjson
+    
+    def _json_dumps(value: Any) -> str:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    _json_loads = orjson.loads
+except ImportError:
+    # orjson is optional; fall back to the stdlib codec
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# Graphs with more tasks than this are inserted with binary COPY instead of executemany
+COPY_THRESHOLD = 500
+
+# Most task status updates written by a single batched UPDATE
+UPDATE_BATCH_MAX = 256
+
+# Per-task scheduling states held in a bytearray indexed by dense task index
+_PENDING, _COMPLETED, _RUNNING, _FAILED = 0, 1, 2, 3
+
+# Marks a graph running and loads its tasks and dependency edges in one round-trip
+_BOOTSTRAP_SQL = """
+    WITH g AS (
+        UPDATE task_graphs SET status = 'running' WHERE id = $1 RETURNING id
+    ), t AS (
+        SELECT id, graph_id, name, status, agent_type, input_data
+        FROM tasks WHERE graph_id = $1
+    ), d AS (
+        SELECT td.task_id, td.depends_on_task_id
+        FROM task_dependencies td JOIN tasks ti ON ti.id = td.task_id
+        WHERE ti.graph_id = $1
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM g) AS found,
+        (SELECT json_agg(t) FROM t) AS tasks,
+        (SELECT json_agg(d) FROM d) AS deps
+"""
+
+# Applies a batch of task updates in one statement; NULL columns keep their current value
+_BATCH_UPDATE_SQL = """
+    UPDATE tasks SET
+        status = v.status,
+        started_at = COALESCE(v.started_at, tasks.started_at),
+        completed_at = COALESCE(v.completed_at, tasks.completed_at),
+        output_data = COALESCE(v.output_data, tasks.output_data),
+        error_message = COALESCE(v.error_message, tasks.error_message)
+    FROM unnest($1::varchar[], $2::varchar[], $3::timestamp[], $4::timestamp[], $5::jsonb[], $6::text[])
+        AS v(id, status, started_at, completed_at, output_data, error_message)
+    WHERE tasks.id = v.id
+"""
+
 
 class OrchestratorState:
     """State for orchestrator graph"""
@@ -97,42 +149,87 @@ class VibeOrchestrator:
         graph_id = str(uuid.uuid4())
         pool = await get_db_pool()
         
+        task_rows = [
+            (
+                task_data.get("id", str(uuid.uuid4())),
+                graph_id,
+                task_data.get("name", ""),
+                "pending",
+                task_data.get("agent_type"),
+                _json_dumps(task_data.get("input_data", {}))
+            )
+            for task_data in tasks
+        ]
+        dep_rows = [(dep["task_id"], dep["depends_on_task_id"]) for dep in dependencies]
+        
         async with pool.acquire() as conn:
-            # Create graph
-            import json
-            await conn.execute("""
-                INSERT INTO task_graphs (id, name, status, metadata)
-                VALUES ($1, $2, $3, $4::jsonb)
-            """, graph_id, name, "pending", json.dumps({}))
-            
-            # Create tasks
-            for task_data in tasks:
-                task_id = task_data.get("id", str(uuid.uuid4()))
-                import json
+            async with conn.transaction():
+                # Create graph
                 await conn.execute("""
-                    INSERT INTO tasks (
-                        id, graph_id, name, status, agent_type, input_data
-                    ) VALUES ($1, $2, $3, $4, $5, $6::jsonb)
-                """, 
-                    task_id,
-                    graph_id,
-                    task_data.get("name", ""),
-                    "pending",
-                    task_data.get("agent_type"),
-                    json.dumps(task_data.get("input_data", {}))
-                )
-            
-            # Create dependencies
-            for dep in dependencies:
-                await conn.execute("""
-                    INSERT INTO task_dependencies (task_id, depends_on_task_id)
-                    VALUES ($1, $2)
-                    ON CONFLICT DO NOTHING
-                """, dep["task_id"], dep["depends_on_task_id"])
+                    INSERT INTO task_graphs (id, name, status, metadata)
+                    VALUES ($1, $2, $3, $4::jsonb)
+                """, graph_id, name, "pending", _json_dumps({}))
+                
+                # Create tasks in one round-trip
+                if len(task_rows) > COPY_THRESHOLD:
+                    await conn.copy_records_to_table(
+                        "tasks",
+                        records=task_rows,
+                        columns=["id", "graph_id", "name", "status", "agent_type", "input_data"]
+                    )
+                elif task_rows:
+                    await conn.executemany("""
+                        INSERT INTO tasks (
+                            id, graph_id, name, status, agent_type, input_data
+                        ) VALUES ($1, $2, $3, $4, $5, $6::jsonb)
+                    """, task_rows)
+                
+                # Create dependencies
+                if dep_rows:
+                    await conn.executemany("""
+                        INSERT INTO task_dependencies (task_id, depends_on_task_id)
+                        VALUES ($1, $2)
+                        ON CONFLICT DO NOTHING
+                    """, dep_rows)
         
         logger.info(f"Created task graph: {graph_id} with {len(tasks)} tasks")
         return graph_id
     
+    async def _flush_task_updates(self, pool, queue: asyncio.Queue):
+        """Write queued task updates in batches until a None sentinel is received"""
+        done = False
+        while not done:
+            batch = [await queue.get()]
+            while not queue.empty() and len(batch) < UPDATE_BATCH_MAX:
+                batch.append(queue.get_nowait())
+            
+            # Merge per task so one statement never updates the same row twice
+            merged: Dict[str, Dict[str, Any]] = {}
+            for update in batch:
+                if update is None:
+                    done = True
+                    continue
+                merged.setdefault(update["id"], {}).update(
+                    {key: value for key, value in update.items() if value is not None}
+                )
+            if not merged:
+                continue
+            
+            rows = list(merged.values())
+            try:
+                async with pool.acquire() as conn:
+                    await conn.execute(
+                        _BATCH_UPDATE_SQL,
+                        [row["id"] for row in rows],
+                        [row["status"] for row in rows],
+                        [row.get("started_at") for row in rows],
+                        [row.get("completed_at") for row in rows],
+                        [row.get("output_data") for row in rows],
+                        [row.get("error_message") for row in rows]
+                    )
+            except Exception as e:
+                logger.error(f"Failed to write {len(rows)} task updates: {str(e)}")
+    
     async def execute_task_graph(
         self,
         graph_id: str,
@@ -142,62 +239,59 @@ class VibeOrchestrator:
         pool = await get_db_pool()
         start_time = datetime.now()
         
-        # Get graph and tasks
+        # Mark the graph running and load tasks and dependencies
         async with pool.acquire() as conn:
-            graph_row = await conn.fetchrow(
-                "SELECT * FROM task_graphs WHERE id = $1", graph_id
-            )
-            if not graph_row:
-                raise ValueError(f"Task graph {graph_id} not found")
-            
-            task_rows = await conn.fetch(
-                "SELECT * FROM tasks WHERE graph_id = $1", graph_id
-            )
-            dep_rows = await conn.fetch(
-                "SELECT * FROM task_dependencies WHERE task_id IN "
-                "(SELECT id FROM tasks WHERE graph_id = $1)", graph_id
-            )
+            bootstrap = await conn.fetchrow(_BOOTSTRAP_SQL, graph_id)
+        if not bootstrap["found"]:
+            raise ValueError(f"Task graph {graph_id} not found")
         
-        # Build dependency graph
-        tasks = {row['id']: Task.from_row(row) for row in task_rows}
-        dependencies: Dict[str, List[str]] = {task_id: [] for task_id in tasks.keys()}
+        task_rows = _json_loads(bootstrap["tasks"] or "[]")
+        dep_rows = _json_loads(bootstrap["deps"] or "[]")
         
-        for dep_row in dep_rows:
-            task_id = dep_row['task_id']
-            depends_on = dep_row['depends_on_task_id']
-            dependencies[task_id].append(depends_on)
+        # Remap task ids to dense indices so scheduling state is list/bytearray lookups
+        # instead of hashing UUID strings; ids are only looked up again for DB writes
+        idx_to_id = [row['id'] for row in task_rows]
+        id_to_idx = {task_id: i for i, task_id in enumerate(idx_to_id)}
+        tasks = [Task.from_row(row) for row in task_rows]
+        deps_idx: List[List[int]] = [[] for _ in tasks]
         
-        # Update graph status
-        async with pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE task_graphs SET status = $1 WHERE id = $2",
-                "running", graph_id
+        for dep_row in dep_rows:
+            # A dependency outside the graph maps to -1 and is never satisfied
+            deps_idx[id_to_idx[dep_row['task_id']]].append(
+                id_to_idx.get(dep_row['depends_on_task_id'], -1)
             )
         
+        # Reverse edges and unmet-dependency counts; a task starts when its count reaches zero.
+        # Tasks on a cycle, behind unknown deps or behind a failed task never start and stay pending.
+        children: List[List[int]] = [[] for _ in tasks]
+        for i, deps in enumerate(deps_idx):
+            for dep in deps:
+                if dep >= 0:
+                    children[dep].append(i)
+        remaining = [len(deps) for deps in deps_idx]
+        
         # Execute tasks in parallel respecting dependencies
-        completed = set()
-        running = set()
-        failed = set()
+        state = bytearray(len(tasks))
         semaphore = asyncio.Semaphore(max_parallel)
         
-        async def execute_task(task_id: str):
+        # Task status changes are queued and written in batches by a single flusher
+        update_queue: asyncio.Queue = asyncio.Queue()
+        flush_task = asyncio.create_task(self._flush_task_updates(pool, update_queue))
+        
+        async def execute_task(i: int):
             """Execute a single task"""
             async with semaphore:
-                task = tasks[task_id]
+                task = tasks[i]
+                task_id = idx_to_id[i]
                 
                 # Check if dependencies are met
-                deps = dependencies[task_id]
-                if not all(dep_id in completed for dep_id in deps):
+                if not all(state[dep] == _COMPLETED for dep in deps_idx[i]):
                     return False
                 
                 # Mark as running
-                async with pool.acquire() as conn:
-                    await conn.execute(
-                        "UPDATE tasks SET status = $1, started_at = $2 WHERE id = $3",
-                        "running", datetime.now(), task_id
-                    )
+                update_queue.put_nowait({"id": task_id, "status": "running", "started_at": datetime.now()})
                 
-                running.add(task_id)
+                state[i] = _RUNNING
                 
                 try:
                     # Execute agent
@@ -206,59 +300,61 @@ class VibeOrchestrator:
                         result = await agent(task.input_data or {})
                         
                         # Update task
-                        import json
-                        async with pool.acquire() as conn:
-                            await conn.execute("""
-                                UPDATE tasks 
-                                SET status = $1, output_data = $2::jsonb, completed_at = $3
-                                WHERE id = $4
-                            """, "completed", json.dumps(result), datetime.now(), task_id)
+                        update_queue.put_nowait({
+                            "id": task_id,
+                            "status": "completed",
+                            "output_data": _json_dumps(result),
+                            "completed_at": datetime.now()
+                        })
                         
-                        completed.add(task_id)
+                        state[i] = _COMPLETED
                         return True
                     else:
                         # No agent, mark as completed
-                        async with pool.acquire() as conn:
-                            await conn.execute(
-                                "UPDATE tasks SET status = $1, completed_at = $2 WHERE id = $3",
-                                "completed", datetime.now(), task_id
-                            )
-                        completed.add(task_id)
+                        update_queue.put_nowait({"id": task_id, "status": "completed", "completed_at": datetime.now()})
+                        state[i] = _COMPLETED
                         return True
                         
                 except Exception as e:
                     logger.error(f"Task {task_id} failed: {str(e)}")
-                    async with pool.acquire() as conn:
-                        await conn.execute("""
-                            UPDATE tasks 
-                            SET status = $1, error_message = $2, completed_at = $3
-                            WHERE id = $4
-                        """, "failed", str(e), datetime.now(), task_id)
-                    failed.add(task_id)
+                    update_queue.put_nowait({
+                        "id": task_id,
+                        "status": "failed",
+                        "error_message": str(e),
+                        "completed_at": datetime.now()
+                    })
+                    state[i] = _FAILED
                     return False
-                finally:
-                    running.discard(task_id)
         
-        # Main execution loop
-        while len(completed) + len(failed) < len(tasks):
-            # Find ready tasks
-            ready_tasks = [
-                task_id for task_id in tasks.keys()
-                if task_id not in completed and task_id not in failed and task_id not in running
-                and all(dep_id in completed for dep_id in dependencies[task_id])
-            ]
-            
-            if not ready_tasks and not running:
-                # Deadlock or all failed
-                break
+        # Running tasks -> dense index; each completion immediately starts the children it unblocks,
+        # so one slow task never holds back work that does not depend on it
+        pending: Dict[asyncio.Task, int] = {}
+        try:
+            for i, count in enumerate(remaining):
+                if count == 0:
+                    pending[asyncio.create_task(execute_task(i))] = i
             
-            # Execute ready tasks
-            await asyncio.gather(*[execute_task(task_id) for task_id in ready_tasks])
-            await asyncio.sleep(0.1)  # Small delay to prevent busy waiting
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    i = pending.pop(finished)
+                    if not finished.result():
+                        continue
+                    for child in children[i]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0:
+                            pending[asyncio.create_task(execute_task(child))] = child
+        finally:
+            for running_task in pending:
+                running_task.cancel()
+            # Flush any remaining task updates before reporting the graph result
+            update_queue.put_nowait(None)
+            await flush_task
         
         # Update graph status
         end_time = datetime.now()
-        final_status = "completed" if len(failed) == 0 else "failed"
+        failed = state.count(_FAILED)
+        final_status = "completed" if failed == 0 else "failed"
         
         async with pool.acquire() as conn:
             await conn.execute(
@@ -269,8 +365,8 @@ class VibeOrchestrator:
         return {
             "graph_id": graph_id,
             "status": final_status,
-            "completed": len(completed),
-            "failed": len(failed),
+            "completed": state.count(_COMPLETED),
+            "failed": failed,
             "total": len(tasks),
             "duration_seconds": (end_time - start_time).total_seconds()
         }
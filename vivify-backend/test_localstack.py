@@ -1,99 +1,263 @@
 """Test LocalStack connectivity and basic AWS operations"""
 
 import asyncio
+import functools
 import boto3
 import os
+import sys
+import shutil
+import subprocess
+import time
+import traceback
+import contextlib
+import contextvars
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from botocore.config import Config
 from services.aws.discovery import AWSDiscoveryService
 from services.aws.terraform import TerraformService
 from services.aws.deployment import DeploymentService
 
-async def test_localstack_connection():
-    """Test LocalStack connection"""
-    print("=" * 60)
-    print("Testing LocalStack Connection")
-    print("=" * 60)
+LOCALSTACK_ENDPOINT = os.getenv("LOCALSTACK_ENDPOINT", "http://localhost:4566")
+
+# Services probed by the connection check; narrow with e.g. LOCALSTACK_TEST_SERVICES=s3
+LOCALSTACK_TEST_SERVICES = [
+    service.strip() for service in os.getenv("LOCALSTACK_TEST_SERVICES", "s3,ec2,lambda").split(",")
+]
+
+# Service -> (list operation, response key, label, noun)
+PROBES = {
+    's3': ('list_buckets', 'Buckets', "S3", "Buckets"),
+    'ec2': ('describe_vpcs', 'Vpcs', "EC2", "VPCs"),
+    'lambda': ('list_functions', 'Functions', "Lambda", "Functions"),
+}
+
+# Seconds allowed for opening the pool and creating the schema, and for the SELECT 1 ping
+DB_INIT_TIMEOUT = 10
+DB_PING_TIMEOUT = 1.5
+
+# One session for every client, so botocore's loaders, service models and credentials are shared
+SESSION = boto3.session.Session(
+    aws_access_key_id='test',
+    aws_secret_access_key='test',
+    region_name='us-east-1'
+)
+
+# Keep pooled loopback connections alive between probes, and fail fast when LocalStack
+# is down instead of sitting through the default retry backoff
+BOTOCORE_CONFIG = Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={"max_attempts": 2, "mode": "standard"}
+)
+
+# Probe responses are reused for this many seconds within a process (watch loops, repeated
+# main() calls); kept short so a LocalStack outage is never masked. VIVIFY_NO_CACHE=1 disables it.
+PROBE_CACHE_TTL = 30
+_probe_cache: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+
+
+_SEPARATOR = "=" * 60
+_BANNER = f"\n{_SEPARATOR}\n{{}}\n{_SEPARATOR}\n"
+
+
+# Output buffer of the check running in the current task; None writes straight to stdout
+_output: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("_output", default=None)
+
+
+def _write(text: str):
+    """Write text to the running check's buffer, or to stdout outside a check"""
+    buffer = _output.get()
+    if buffer is None:
+        sys.stdout.write(text)
+    else:
+        buffer.append(text)
+
+
+def _out(line: str = ""):
+    """Print a line of check output"""
+    _write(line + "\n")
+
+
+def _banner(title: str):
+    """Print a section banner in a single write"""
+    _write(_BANNER.format(title))
+
+
+def _fail(label: str, e: Exception):
+    """Report a failed check; the traceback is only printed when VIVIFY_TEST_VERBOSE=1"""
+    _out(f"✗ {label} failed: {str(e)}")
+    if os.getenv("VIVIFY_TEST_VERBOSE") == "1":
+        _write(traceback.format_exc())
+
+
+@functools.lru_cache(maxsize=1)
+def _aio_session():
+    """aioboto3 session when VIVIFY_AWS_ASYNC=1 and aioboto3 is installed, otherwise None"""
+    if os.getenv("VIVIFY_AWS_ASYNC") != "1":
+        return None
+    try:
+        import aioboto3
+    except ImportError:
+        return None
+    return aioboto3.Session(
+        aws_access_key_id='test',
+        aws_secret_access_key='test',
+        region_name='us-east-1'
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _client(service: str):
+    """Get a cached LocalStack client for a service"""
+    return SESSION.client(service, endpoint_url=LOCALSTACK_ENDPOINT, config=BOTOCORE_CONFIG)
+
+
+@functools.lru_cache(maxsize=1)
+def _terraform_version() -> Optional[str]:
+    """Installed Terraform version, or None if the CLI is missing or errors (checked once per process)"""
+    path = shutil.which("terraform")
+    if not path:
+        return None
+    result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=5)
+    return result.stdout.strip().split()[1] if result.returncode == 0 else None
+
+
+@functools.lru_cache(maxsize=1)
+def _terraform_service() -> TerraformService:
+    """Get the Terraform service shared by every run in this process"""
+    return TerraformService()
+
+
+@functools.lru_cache(maxsize=None)
+def _agent(cls):
+    """Construct an agent once per process and reuse it on later runs"""
+    return cls()
+
+
+async def _probe(service: str, operation: str) -> dict:
+    """Call a LocalStack operation in a worker thread
     
-    endpoint = os.getenv("LOCALSTACK_ENDPOINT", "http://localhost:4566")
-    print(f"Endpoint: {endpoint}")
+    Clients are created on the calling thread, since a boto3 session is not thread-safe.
+    """
+    client = _client(service)
+    return await asyncio.to_thread(getattr(client, operation))
+
+
+async def _probe_all(services: List[str]) -> list:
+    """Run each service's list operation concurrently, natively async when aioboto3 is enabled
     
-    # Test S3
-    try:
-        s3 = boto3.client(
-            's3',
-            endpoint_url=endpoint,
-            aws_access_key_id='test',
-            aws_secret_access_key='test',
-            region_name='us-east-1'
+    Successful responses younger than PROBE_CACHE_TTL are served from the in-process cache.
+    """
+    use_cache = os.getenv("VIVIFY_NO_CACHE") != "1"
+    now = time.monotonic()
+    cached = {}
+    if use_cache:
+        for service in services:
+            entry = _probe_cache.get((service, LOCALSTACK_ENDPOINT))
+            if entry is not None and now - entry[0] < PROBE_CACHE_TTL:
+                cached[service] = entry[1]
+    
+    missing = [service for service in services if service not in cached]
+    if missing:
+        fresh = dict(zip(missing, await _fetch_probes(missing)))
+        now = time.monotonic()
+        for service, response in fresh.items():
+            if use_cache and not isinstance(response, Exception):
+                _probe_cache[(service, LOCALSTACK_ENDPOINT)] = (now, response)
+        cached.update(fresh)
+    
+    return [cached[service] for service in services]
+
+
+async def _fetch_probes(services: List[str]) -> list:
+    """Call each service's list operation concurrently, returning exceptions in place"""
+    session = _aio_session()
+    if session is None:
+        return await asyncio.gather(
+            *(_probe(service, PROBES[service][0]) for service in services),
+            return_exceptions=True
         )
-        buckets = s3.list_buckets()
-        print("✓ S3 connection successful")
-        print(f"  Buckets: {len(buckets.get('Buckets', []))}")
-    except Exception as e:
-        print(f"✗ S3 connection failed: {str(e)}")
-        return False
     
-    # Test EC2
-    try:
-        ec2 = boto3.client(
-            'ec2',
-            endpoint_url=endpoint,
-            aws_access_key_id='test',
-            aws_secret_access_key='test',
-            region_name='us-east-1'
+    async with contextlib.AsyncExitStack() as stack:
+        clients = [
+            await stack.enter_async_context(
+                session.client(service, endpoint_url=LOCALSTACK_ENDPOINT, config=BOTOCORE_CONFIG)
+            )
+            for service in services
+        ]
+        return await asyncio.gather(
+            *(getattr(client, PROBES[service][0])() for service, client in zip(services, clients)),
+            return_exceptions=True
         )
-        vpcs = ec2.describe_vpcs()
-        print("✓ EC2 connection successful")
-        print(f"  VPCs: {len(vpcs.get('Vpcs', []))}")
-    except Exception as e:
-        print(f"✗ EC2 connection failed: {str(e)}")
-        return False
+
+
+async def test_localstack_connection():
+    """Test LocalStack connection"""
+    _banner("Testing LocalStack Connection")
+    
+    _out(f"Endpoint: {LOCALSTACK_ENDPOINT}")
     
-    # Test Lambda
+    # TCP preflight: one quick failed connect beats three clients timing out and retrying
+    endpoint = urlparse(LOCALSTACK_ENDPOINT)
     try:
-        lambda_client = boto3.client(
-            'lambda',
-            endpoint_url=endpoint,
-            aws_access_key_id='test',
-            aws_secret_access_key='test',
-            region_name='us-east-1'
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(endpoint.hostname, endpoint.port or 4566),
+            timeout=0.25
         )
-        functions = lambda_client.list_functions()
-        print("✓ Lambda connection successful")
-        print(f"  Functions: {len(functions.get('Functions', []))}")
-    except Exception as e:
-        print(f"✗ Lambda connection failed: {str(e)}")
+    except (OSError, asyncio.TimeoutError):
+        _out(f"✗ LocalStack unreachable at {LOCALSTACK_ENDPOINT}")
         return False
+    try:
+        writer.close()
+    finally:
+        # Wait for the transport to shut down so it is not reported as unclosed
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+    
+    # Probe the selected services concurrently (aioboto3 with VIVIFY_AWS_ASYNC=1, else worker threads)
+    services = [service for service in LOCALSTACK_TEST_SERVICES if service in PROBES]
+    responses = await _probe_all(services)
+    
+    ok = True
+    for service, response in zip(services, responses):
+        _, key, label, noun = PROBES[service]
+        if isinstance(response, Exception):
+            _out(f"✗ {label} connection failed: {str(response)}")
+            ok = False
+        else:
+            _out(f"✓ {label} connection successful")
+            _out(f"  {noun}: {len(response.get(key, []))}")
     
-    return True
+    return ok
 
 
 async def test_discovery_service():
     """Test AWS discovery service"""
-    print("\n" + "=" * 60)
-    print("Testing Discovery Service")
-    print("=" * 60)
+    _banner("Testing Discovery Service")
     
     try:
-        discovery = AWSDiscoveryService(use_localstack=True)
-        resources = await discovery.discover_all(["us-east-1"])
-        print("✓ Discovery service working")
-        print(f"  Total resources: {resources.get('total_count', 0)}")
+        # Several comma-separated regions exercise discover_all's concurrent per-region fan-out
+        regions = [region.strip() for region in os.getenv("TEST_REGIONS", "us-east-1").split(",") if region.strip()]
+        async with AWSDiscoveryService(use_localstack=True) as discovery:
+            resources = await discovery.discover_all(regions)
+        _out("✓ Discovery service working")
+        _out(f"  Regions: {', '.join(regions)}")
+        _out(f"  Total resources: {resources.get('total_count', 0)}")
         return True
     except Exception as e:
-        print(f"✗ Discovery service failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        _fail("Discovery service", e)
         return False
 
 
 async def test_terraform_service():
     """Test Terraform service"""
-    print("\n" + "=" * 60)
-    print("Testing Terraform Service")
-    print("=" * 60)
+    _banner("Testing Terraform Service")
     
     try:
-        terraform = TerraformService()
+        terraform = _terraform_service()
         
         # Generate a simple config
         resources = [
@@ -105,58 +269,45 @@ async def test_terraform_service():
         ]
         
         config = terraform.generate_terraform_config(resources)
-        print("✓ Terraform config generation working")
-        print(f"  Config length: {len(config)} characters")
+        _out("✓ Terraform config generation working")
+        _out(f"  Config length: {len(config)} characters")
         
         # Check if terraform is installed
-        import subprocess
-        try:
-            result = subprocess.run(
-                ["terraform", "--version"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                print("✓ Terraform CLI is installed")
-                print(f"  Version: {result.stdout.strip().split()[1]}")
-            else:
-                print("⚠ Terraform CLI not found or error")
-        except FileNotFoundError:
-            print("⚠ Terraform CLI not found in PATH")
-        except Exception as e:
-            print(f"⚠ Error checking Terraform: {str(e)}")
+        if shutil.which("terraform") is None:
+            _out("⚠ Terraform CLI not found in PATH")
+        else:
+            try:
+                version = await asyncio.to_thread(_terraform_version)
+                if version:
+                    _out("✓ Terraform CLI is installed")
+                    _out(f"  Version: {version}")
+                else:
+                    _out("⚠ Terraform CLI not found or error")
+            except Exception as e:
+                _out(f"⚠ Error checking Terraform: {str(e)}")
         
         return True
     except Exception as e:
-        print(f"✗ Terraform service failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        _fail("Terraform service", e)
         return False
 
 
 async def test_deployment_service():
     """Test deployment service (without actually deploying)"""
-    print("\n" + "=" * 60)
-    print("Testing Deployment Service")
-    print("=" * 60)
+    _banner("Testing Deployment Service")
     
     try:
         deployment = DeploymentService()
-        print("✓ Deployment service initialized")
+        _out("✓ Deployment service initialized")
         return True
     except Exception as e:
-        print(f"✗ Deployment service failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        _fail("Deployment service", e)
         return False
 
 
 async def test_agents():
     """Test agent initialization"""
-    print("\n" + "=" * 60)
-    print("Testing Agents")
-    print("=" * 60)
+    _banner("Testing Agents")
     
     try:
         from services.agents import (
@@ -170,119 +321,138 @@ async def test_agents():
         
         # Check if GEMINI_API_KEY is set
         if not os.getenv("GEMINI_API_KEY"):
-            print("⚠ GEMINI_API_KEY not set - agents requiring LLM will fail")
+            _out("⚠ GEMINI_API_KEY not set - agents requiring LLM will fail")
         
         # Test agents that don't need API key
-        iac_agent = IaCAgent()
-        print("✓ IaC Agent initialized")
+        iac_agent = _agent(IaCAgent)
+        _out("✓ IaC Agent initialized")
         
-        deployment_agent = DeploymentAgent()
-        print("✓ Deployment Agent initialized")
+        deployment_agent = _agent(DeploymentAgent)
+        _out("✓ Deployment Agent initialized")
         
-        monitoring_agent = MonitoringAgent()
-        print("✓ Monitoring Agent initialized")
+        monitoring_agent = _agent(MonitoringAgent)
+        _out("✓ Monitoring Agent initialized")
         
-        compliance_agent = ComplianceAgent()
-        print("✓ Compliance Agent initialized")
+        compliance_agent = _agent(ComplianceAgent)
+        _out("✓ Compliance Agent initialized")
         
         # Test agents that need API key (if available)
         if os.getenv("GEMINI_API_KEY"):
             try:
-                req_agent = RequirementsAgent()
-                print("✓ Requirements Agent initialized")
+                req_agent = _agent(RequirementsAgent)
+                _out("✓ Requirements Agent initialized")
             except Exception as e:
-                print(f"⚠ Requirements Agent failed: {str(e)}")
+                _out(f"⚠ Requirements Agent failed: {str(e)}")
             
             try:
-                arch_agent = ArchitectureAgent()
-                print("✓ Architecture Agent initialized")
+                arch_agent = _agent(ArchitectureAgent)
+                _out("✓ Architecture Agent initialized")
             except Exception as e:
-                print(f"⚠ Architecture Agent failed: {str(e)}")
+                _out(f"⚠ Architecture Agent failed: {str(e)}")
         else:
-            print("⚠ Skipping Requirements/Architecture agents (no API key)")
+            _out("⚠ Skipping Requirements/Architecture agents (no API key)")
         
         return True
     except Exception as e:
-        print(f"✗ Agent initialization failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        _fail("Agent initialization", e)
         return False
 
 
 async def test_database():
     """Test database connection"""
-    print("\n" + "=" * 60)
-    print("Testing Database Connection")
-    print("=" * 60)
+    _banner("Testing Database Connection")
     
     try:
         from database.connection import get_db_pool, init_db
         
-        # Initialize database
-        await init_db()
-        print("✓ Database schema initialized")
+        # Initialize database (this also opens the pool); bounded so a dead Postgres fails fast
+        await asyncio.wait_for(init_db(), timeout=DB_INIT_TIMEOUT)
+        _out("✓ Database schema initialized")
         
-        # Test connection
+        # Ping through the already-open pool
         pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            result = await conn.fetchval("SELECT 1")
-            if result == 1:
-                print("✓ Database connection successful")
-                return True
-            else:
-                print("✗ Database query failed")
-                return False
+        result = await asyncio.wait_for(pool.fetchval("SELECT 1"), timeout=DB_PING_TIMEOUT)
+        if result == 1:
+            _out("✓ Database connection successful")
+            return True
+        else:
+            _out("✗ Database query failed")
+            return False
+    except asyncio.TimeoutError:
+        _out("✗ Database connection failed: timed out")
+        _out("  Make sure PostgreSQL is running: docker-compose up -d postgres")
+        return False
     except Exception as e:
-        print(f"✗ Database connection failed: {str(e)}")
-        print("  Make sure PostgreSQL is running: docker-compose up -d postgres")
-        import traceback
-        traceback.print_exc()
+        _fail("Database connection", e)
+        _out("  Make sure PostgreSQL is running: docker-compose up -d postgres")
         return False
 
 
+# Checks that share no state and run concurrently
+LOCALSTACK_TEST = "LocalStack Connection"
+INDEPENDENT_TESTS = [
+    ("Database", test_database),
+    (LOCALSTACK_TEST, test_localstack_connection),
+    ("Terraform Service", test_terraform_service),
+    ("Agents", test_agents),
+]
+
+# Checks that only run once the LocalStack connection check has passed
+GATED_TESTS = [
+    ("Discovery Service", test_discovery_service),
+    ("Deployment Service", test_deployment_service),
+]
+
+
+async def _run_check(name: str, test) -> Tuple[Any, str]:
+    """Run one check with its output buffered; returns its outcome and output"""
+    buffer: List[str] = []
+    # gather runs each check in its own task, so this only captures that check's output
+    _output.set(buffer)
+    try:
+        outcome = await test()
+    except Exception as e:
+        _fail(name, e)
+        outcome = e
+    return outcome, "".join(buffer)
+
+
+async def _run_phase(tests) -> List[Tuple[str, bool]]:
+    """Run checks concurrently, then print each check's output as one uninterleaved block"""
+    checks = await asyncio.gather(*(_run_check(name, test) for name, test in tests))
+    for _, text in checks:
+        sys.stdout.write(text)
+    return [(name, outcome is True) for (name, _), (outcome, _) in zip(tests, checks)]
+
+
 async def main():
     """Run all tests"""
-    print("\n" + "=" * 60)
-    print("LocalStack Integration Tests")
-    print("=" * 60)
-    print("\nMake sure LocalStack is running:")
-    print("  docker-compose up -d localstack")
-    print("  or")
-    print("  docker run -d -p 4566:4566 localstack/localstack\n")
-    
-    results = []
-    
-    # Test database first (required for most operations)
-    results.append(("Database", await test_database()))
-    
-    # Test LocalStack connection
-    localstack_ok = await test_localstack_connection()
-    results.append(("LocalStack Connection", localstack_ok))
+    _banner("LocalStack Integration Tests")
+    _out("\nMake sure LocalStack is running:")
+    _out("  docker-compose up -d localstack")
+    _out("  or")
+    _out("  docker run -d -p 4566:4566 localstack/localstack\n")
     
-    if localstack_ok:
-        # Test services
-        results.append(("Discovery Service", await test_discovery_service()))
-        results.append(("Terraform Service", await test_terraform_service()))
-        results.append(("Deployment Service", await test_deployment_service()))
+    # Phase 1: independent checks run concurrently
+    results = await _run_phase(INDEPENDENT_TESTS)
     
-    # Test agents
-    results.append(("Agents", await test_agents()))
+    # Phase 2: services that need LocalStack
+    if dict(results)[LOCALSTACK_TEST]:
+        results.extend(await _run_phase(GATED_TESTS))
     
     # Summary
-    print("\n" + "=" * 60)
-    print("Test Summary")
-    print("=" * 60)
+    _banner("Test Summary")
     
     for name, passed in results:
         status = "✓ PASS" if passed else "✗ FAIL"
-        print(f"{status}: {name}")
+        _out(f"{status}: {name}")
     
     all_passed = all(result[1] for result in results)
     
     if all_passed:
-        print("\n✓ All tests passed! Ready to run experiments.")
+        _out("\n✓ All tests passed! Ready to run experiments.")
     else:
-        print("\n⚠ Some tests failed. Please fix issues before running experiments.")
+        _out("\n⚠ Some tests failed. Please fix issues before running experiments.")
     
     return all_passed
 